@@ -1,14 +1,45 @@
-import requests
-import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
 
+from src.dispatcher import AlertDispatcher
+from src.channels import ChannelMetrics, SMTPClient, TelegramClient
+from src.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 class AlertSystem: 
     def __init__(self, config):
         self.config = config.get('alert_methods', {})
+        self.dispatch_config = config
+        self.dispatcher = None
+        self.metrics = ChannelMetrics()
+        self.telegram_client = None
+        self.smtp_client = None
+    
+    def get_telegram_client(self):
+        """Cliente Telegram reutilizado entre envios (keep-alive)"""
+        if self.telegram_client is None:
+            telegram_config = self.config.get('telegram', {})
+            self.telegram_client = TelegramClient(
+                telegram_config.get('bot_token', ''),
+                telegram_config.get('api_url', 'https://api.telegram.org')
+            )
+        return self.telegram_client
+    
+    def get_smtp_client(self):
+        """Conexão SMTP persistente, com reconexão em caso de falha"""
+        if self.smtp_client is None:
+            email_config = self.config.get('email', {})
+            self.smtp_client = SMTPClient(
+                email_config.get('smtp_server', ''),
+                email_config.get('smtp_port', 587),
+                email_config.get('username', ''),
+                email_config.get('password', ''),
+                starttls=email_config.get('starttls', True)
+            )
+        return self.smtp_client
     
     def send_telegram_alert(self, message):
         telegram_config = self.config.get('telegram', {})
@@ -20,23 +51,25 @@ class AlertSystem:
                 logger.warning("Configuração do Telegram incompleta")
                 return False
             
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
             payload = {
                 'chat_id': chat_id, 
                 'text': message,
                 'parse_mode': 'HTML'
             }
+            start = time.perf_counter()
             try:
-                response = requests.post(url, json=payload, timeout=10)
-                return response.status_code == 200
+                ok = self.get_telegram_client().send(payload, as_json=True)
             except Exception as e:
                 logger.error(f"Erro ao enviar alerta Telegram: {e}")
-                return False
+                ok = False
+            self.metrics.record('telegram', time.perf_counter() - start, ok)
+            return ok
         return False
     
     def send_email_alert(self, subject, message):
         email_config = self.config.get('email', {})
         if email_config.get('enabled'):
+            start = time.perf_counter()
             try:
                 msg = MIMEMultipart()
                 msg['Subject'] = subject
@@ -45,21 +78,12 @@ class AlertSystem:
                 
                 msg.attach(MIMEText(message, 'plain'))
                 
-                with smtplib.SMTP(
-                    email_config.get('smtp_server', ''), 
-                    email_config.get('smtp_port', 587)
-                ) as server:
-                    server.starttls()
-                    server.login(
-                        email_config.get('username', ''), 
-                        email_config.get('password', '')
-                    )
-                    server.send_message(msg)
-                
-                return True
+                ok = self.get_smtp_client().send_message(msg)
             except Exception as e:
                 logger.error(f"Erro ao enviar email: {e}")
-                return False
+                ok = False
+            self.metrics.record('email', time.perf_counter() - start, ok)
+            return ok
         return False
     
     def send_console_alert(self, message):
@@ -80,4 +104,53 @@ class AlertSystem:
         elif alert_type == 'email':
             return self.send_email_alert(subject, message)
         else:
-            return self.send_console_alert(f"{subject}: {message}")
\ No newline at end of file
+            return self.send_console_alert(f"{subject}: {message}")
+    
+    def start_dispatcher(self):
+        """Inicia o despacho assíncrono (fila, lotes, limite e retentativas)"""
+        if self.dispatcher is None:
+            senders = {}
+            for alert_type in ('telegram', 'email', 'console'):
+                if self.config.get(alert_type, {}).get('enabled'):
+                    senders[alert_type] = (
+                        lambda subject, message, alert_type=alert_type:
+                            self.send_alert(subject, message, alert_type)
+                    )
+            self.dispatcher = AlertDispatcher.from_config(senders, self.dispatch_config).start()
+            metrics.alert_queue_depth.callback = self.queue_depth_samples
+        return self.dispatcher
+    
+    def queue_depth_samples(self):
+        """Profundidade das filas do dispatcher no formato do Gauge de métricas"""
+        if self.dispatcher is None:
+            return []
+        return [({'channel': channel}, depth)
+                for channel, depth in self.dispatcher.queue_depth().items()]
+    
+    def enqueue_alert(self, subject, message, file_path=None, alert_type=None):
+        """
+        Enfileira o alerta e retorna imediatamente
+        
+        Args:
+            subject: Assunto do alerta (alertas com o mesmo assunto são agrupados)
+            message: Mensagem do alerta
+            file_path: Arquivo relacionado, usado no resumo do lote
+            alert_type: Canal específico ou None para todos os habilitados
+        """
+        channels = [alert_type] if alert_type else None
+        return self.start_dispatcher().submit(subject, message, file_path, channels)
+    
+    def stop_dispatcher(self, timeout=None):
+        if self.dispatcher:
+            self.dispatcher.stop(timeout)
+            self.dispatcher = None
+        self.close()
+    
+    def close(self):
+        """Fecha as conexões mantidas com os canais"""
+        if self.smtp_client:
+            self.smtp_client.close()
+            self.smtp_client = None
+        if self.telegram_client:
+            self.telegram_client.close()
+            self.telegram_client = None
\ No newline at end of file
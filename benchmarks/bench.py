@@ -0,0 +1,408 @@
+"""Benchmarks de hashing, varredura e verificação do PyWatchdog
+
+Gera árvores sintéticas em um diretório temporário (muitos arquivos
+pequenos, poucos arquivos enormes, aninhamento profundo) e mede arquivos/s,
+MB/s, pico de RSS e latência por ciclo de cada caso. Cada caso roda em um
+processo próprio para que o pico de RSS não se misture entre casos.
+
+Uso:
+    python benchmarks/bench.py --scale 0.1 --output resultados.json
+    python benchmarks/bench.py --compare resultados.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+import multiprocessing
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+MB = 1024 * 1024
+
+DATASETS = {
+    # nome: (arquivos, tamanho de cada arquivo em bytes, profundidade)
+    'small': (5000, 4096, 2),
+    'huge': (4, 256 * MB, 1),
+    'deep': (2000, 16384, 40),
+}
+
+
+def generate_dataset(directory, name, scale=1.0, seed=42):
+    """Cria a árvore sintética do dataset e retorna (arquivos, bytes)"""
+    count, size, depth = DATASETS[name]
+    count = max(1, int(count * scale)) if name != 'huge' else count
+    size = max(1, int(size * scale)) if name == 'huge' else size
+    rng = random.Random(seed)
+    block = rng.randbytes(min(size, MB))
+
+    total = 0
+    for index in range(count):
+        level = index % depth
+        parts = [f"d{(index // depth) % 50}"] + [f"n{i}" for i in range(level)]
+        folder = os.path.join(directory, name, *parts)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"f{index}.dat")
+        with open(path, 'wb') as f:
+            f.write(index.to_bytes(8, 'little'))
+            remaining = size - 8
+            while remaining > 0:
+                chunk = block[:remaining]
+                f.write(chunk)
+                remaining -= len(chunk)
+        total += max(size, 8)
+    return count, total
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def latency_summary(samples):
+    ordered = sorted(samples)
+    return {
+        'min': ordered[0],
+        'p50': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+        'mean': statistics.fmean(ordered)
+    }
+
+
+def dataset_files(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            yield os.path.join(root, name)
+
+
+def write_config(workdir, data_dir, algorithm, executor, **extra):
+    path = os.path.join(workdir, f"config-{algorithm}-{executor}.yaml")
+    with open(path, 'w') as f:
+        json.dump(dict({
+            'monitored_dirs': [data_dir],
+            'file_types': ['.dat'],
+            'hash_algorithm': algorithm,
+            'check_interval': 60,
+            'baseline_executor': executor,
+            'progress_every': 0
+        }, **extra), f)
+    return path
+
+
+def bench_baseline(data_dir, workdir, engine, cycles):
+    """create_baseline seguido de ciclos rápidos e de um rehash completo"""
+    from src.monitor import FileIntegrityMonitor
+
+    algorithm, executor = engine.split(':')
+    monitor = FileIntegrityMonitor(write_config(workdir, data_dir, algorithm, executor))
+
+    start = time.perf_counter()
+    baseline = monitor.create_baseline()
+    seconds = time.perf_counter() - start
+    size = sum(entry['size'] for entry in baseline.values())
+
+    fast = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        monitor.run_cycle(full_rehash=False)
+        fast.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    monitor.run_cycle(full_rehash=True)
+    full = time.perf_counter() - start
+    monitor.shutdown()
+
+    return {
+        'files': len(baseline),
+        'bytes': size,
+        'seconds': seconds,
+        'cycle_latency': latency_summary(fast),
+        'full_rehash_seconds': full
+    }
+
+
+def bench_multiple_hashes(data_dir, workdir, engine, cycles):
+    """AdvancedHasher.calculate_multiple_hashes em todos os arquivos"""
+    from src.hasher import AdvancedHasher
+
+    hasher = AdvancedHasher(algorithms=engine.split('+'))
+    files = list(dataset_files(data_dir))
+    size = 0
+    start = time.perf_counter()
+    for path in files:
+        hasher.calculate_multiple_hashes(path)
+        size += os.path.getsize(path)
+    return {'files': len(files), 'bytes': size, 'seconds': time.perf_counter() - start}
+
+
+def bench_verify(data_dir, workdir, engine, cycles):
+    """verify_files_against_baseline sobre uma baseline sem alterações"""
+    from src.hasher import AdvancedHasher, verify_files_against_baseline
+
+    hasher = AdvancedHasher(algorithm=engine, algorithms=[engine])
+    files_baseline = {path: hasher.create_file_baseline(path) for path in dataset_files(data_dir)}
+    size = sum(data['metadata']['size'] for data in files_baseline.values())
+
+    latencies = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        verify_files_against_baseline(files_baseline, hasher)
+        latencies.append(time.perf_counter() - start)
+    return {
+        'files': len(files_baseline),
+        'bytes': size,
+        'seconds': min(latencies),
+        'cycle_latency': latency_summary(latencies)
+    }
+
+
+def bench_sharded(data_dir, workdir, engine, cycles):
+    """create_baseline e verify_sharded distribuídos entre N workers locais"""
+    from src.monitor import FileIntegrityMonitor
+
+    workers = int(engine.split(':')[1])
+    config = write_config(workdir, data_dir, 'sha256', f"sharded{workers}", sharding={
+        'enabled': True, 'workers': workers, 'strategy': 'hash', 'hash_shards': 4 * workers
+    })
+    monitor = FileIntegrityMonitor(config)
+
+    start = time.perf_counter()
+    baseline = monitor.create_baseline()
+    seconds = time.perf_counter() - start
+    size = sum(entry['size'] for entry in baseline.values())
+
+    latencies = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        monitor.verify_sharded()
+        latencies.append(time.perf_counter() - start)
+    monitor.shutdown()
+    return {
+        'files': len(baseline),
+        'bytes': size,
+        'seconds': seconds,
+        'cycle_latency': latency_summary(latencies)
+    }
+
+
+def bench_hash_engine(data_dir, workdir, engine, cycles):
+    """Vazão de um algoritmo com uma estratégia de leitura do HashEngine
+
+    'chunk4k' reproduz o loop antigo de f.read(4096) como referência.
+    """
+    import hashlib
+    from src.hash_engine import HashEngine
+
+    algorithm, strategy = engine.split(':')
+    if algorithm == 'blake3':
+        import blake3  # noqa: F401 (opcional: sem ele o caso é ignorado)
+
+    if strategy == 'chunk4k':
+        def digest(path, algorithm):
+            hash_func = hashlib.new(algorithm)
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(4096), b""):
+                    hash_func.update(chunk)
+            return hash_func.hexdigest()
+    else:
+        digest = HashEngine(strategy).hash_file
+
+    files = [(path, os.path.getsize(path)) for path in dataset_files(data_dir)]
+    latencies = []
+    for _ in range(max(cycles, 1)):
+        start = time.perf_counter()
+        for path, _ in files:
+            digest(path, algorithm)
+        latencies.append(time.perf_counter() - start)
+    return {
+        'files': len(files),
+        'bytes': sum(size for _, size in files),
+        'seconds': min(latencies),
+        'cycle_latency': latency_summary(latencies)
+    }
+
+
+CASES = {
+    'baseline': (bench_baseline, ['sha256:thread', 'md5:thread', 'sha256:process']),
+    'multiple_hashes': (bench_multiple_hashes, ['md5+sha1+sha256+sha512', 'sha256']),
+    'verify': (bench_verify, ['sha256']),
+    'sharded': (bench_sharded, ['workers:1', 'workers:2', 'workers:4']),
+    'hash_engine': (bench_hash_engine, [
+        'sha256:chunk4k', 'sha256:read', 'sha256:readinto', 'sha256:mmap',
+        'sha256:file_digest', 'sha256:auto', 'md5:auto', 'sha1:auto', 'blake2b:auto',
+        'blake2s:auto', 'blake3:auto'
+    ]),
+}
+
+
+def run_case(case, dataset, engine, data_dir, workdir, cycles):
+    """Executa um caso no processo atual (chamado em um processo filho)"""
+    os.chdir(workdir)
+    function = CASES[case][0]
+    try:
+        result = function(data_dir, workdir, engine, cycles)
+    except ImportError as e:
+        return {'case': case, 'dataset': dataset, 'engine': engine,
+                'skipped': f"dependência ausente: {e}"}
+
+    seconds = result['seconds'] or 1e-9
+    result.update({
+        'case': case,
+        'dataset': dataset,
+        'engine': engine,
+        'files_per_sec': result['files'] / seconds,
+        'mb_per_sec': result['bytes'] / MB / seconds,
+        'peak_rss_kb': peak_rss_kb()
+    })
+    return result
+
+
+def _child(connection, args):
+    try:
+        connection.send(run_case(*args))
+    except Exception as e:
+        connection.send({'case': args[0], 'dataset': args[1], 'engine': args[2],
+                         'skipped': f"erro: {e}"})
+    finally:
+        connection.close()
+
+
+def run_isolated(context, *args):
+    """Roda run_case em um processo novo (não daemon, pode ter seu próprio pool)"""
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, args))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        return {'case': args[0], 'dataset': args[1], 'engine': args[2],
+                'skipped': f"processo terminou com código {process.exitcode}"}
+    finally:
+        process.join()
+
+
+def run_all(cases, datasets, scale, cycles, workdir):
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for dataset in datasets:
+        data_dir = os.path.join(workdir, 'data', dataset)
+        count, size = generate_dataset(os.path.join(workdir, 'data'), dataset, scale)
+        print(f"# dataset {dataset}: {count} arquivos, {size / MB:.1f} MB", file=sys.stderr)
+
+        for case in cases:
+            for engine in CASES[case][1]:
+                result = run_isolated(context, case, dataset, engine, data_dir, workdir, cycles)
+                results.append(result)
+                print(format_result(result), file=sys.stderr)
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def format_result(result):
+    name = f"{result['case']}/{result['dataset']}/{result['engine']}"
+    if 'skipped' in result:
+        return f"{name:50s} ignorado ({result['skipped']})"
+    line = (f"{name:50s} {result['files_per_sec']:10.1f} arq/s "
+            f"{result['mb_per_sec']:9.1f} MB/s {result['peak_rss_kb'] / 1024:7.1f} MB RSS")
+    if 'cycle_latency' in result:
+        line += f" ciclo p50 {result['cycle_latency']['p50'] * 1000:.1f} ms"
+    return line
+
+
+def result_key(result):
+    return f"{result['case']}/{result['dataset']}/{result['engine']}"
+
+
+def compare(results, reference, tolerance):
+    """Compara com uma execução de referência e retorna as regressões
+
+    Vazão (arq/s, MB/s) menor ou latência p50 maior que a referência além
+    da tolerância conta como regressão.
+    """
+    previous = {result_key(r): r for r in reference['results'] if 'skipped' not in r}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or 'skipped' in result:
+            continue
+        checks = [(metric, old[metric], result[metric], True)
+                  for metric in ('files_per_sec', 'mb_per_sec')]
+        if 'cycle_latency' in result and 'cycle_latency' in old:
+            checks.append(('cycle_p50', old['cycle_latency']['p50'],
+                           result['cycle_latency']['p50'], False))
+
+        for metric, before, after, higher_is_better in checks:
+            if not before:
+                continue
+            change = (after - before) / before
+            if (higher_is_better and change < -tolerance) or \
+                    (not higher_is_better and change > tolerance):
+                regressions.append({'benchmark': result_key(result), 'metric': metric,
+                                    'reference': before, 'current': after, 'change': change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do PyWatchdog")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="fator de tamanho dos datasets (ex.: 0.1 para rodar rápido)")
+    parser.add_argument('--datasets', nargs='+', choices=sorted(DATASETS), default=list(DATASETS))
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--cycles', type=int, default=5, help="ciclos medidos por caso")
+    parser.add_argument('--output', help="grava os resultados em JSON neste arquivo")
+    parser.add_argument('--compare', help="JSON de uma execução de referência")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="variação relativa aceita antes de acusar regressão")
+    parser.add_argument('--workdir', help="diretório de trabalho (padrão: temporário)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='pywatchdog-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_all(args.cases, args.datasets, args.scale, args.cycles, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': args.scale,
+            'cycles': args.cycles
+        },
+        'results': results
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            report['regressions'] = compare(results, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"REGRESSÃO {regression['benchmark']} {regression['metric']}: "
+                  f"{regression['reference']:.3f} -> {regression['current']:.3f} "
+                  f"({regression['change']:+.0%})", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Benchmark de tempo de inicialização do PyWatchdog
+
+Mede, em processos Python novos, o tempo de importar o pacote e os módulos
+usados pela CLI e o de uma verificação avulsa (carregar a baseline do
+SQLite e rodar um ciclo), como nas execuções via cron. Também acusa quando
+um caso "leve" importa subsistemas pesados (Flask, pycryptodome, requests,
+smtplib, watchdog).
+
+Uso:
+    python benchmarks/startup.py --output startup.json
+    python benchmarks/startup.py --compare startup.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['flask', 'Crypto', 'requests', 'smtplib', 'watchdog']
+
+REPORT_MODULES = (
+    "import sys, json\n"
+    f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))\n"
+)
+
+# nome: (código, deve evitar módulos pesados)
+CASES = {
+    'import_src': ("import src\n", True),
+    'import_package_exports': ("import src.__int__\n", True),
+    'import_monitor': ("from src.monitor import FileIntegrityMonitor\n", True),
+    'hasher_init': (
+        "from src.hasher import AdvancedHasher\n"
+        "AdvancedHasher(private_key_path='keys/private.pem', public_key_path='keys/public.pem')\n",
+        True
+    ),
+    'one_shot_verify': (
+        "from src.monitor import FileIntegrityMonitor\n"
+        "monitor = FileIntegrityMonitor('config.yaml')\n"
+        "monitor.load_baseline()\n"
+        "monitor.run_cycle()\n"
+        "monitor.shutdown()\n",
+        True
+    ),
+}
+
+
+def prepare(workdir, files=200):
+    """Cria uma árvore pequena e a baseline persistida usada pelo one_shot_verify"""
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    for index in range(files):
+        with open(os.path.join(data_dir, f"f{index}.conf"), 'w') as f:
+            f.write(f"chave_{index} = {index}\n" * 20)
+    with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+        json.dump({
+            'monitored_dirs': [data_dir],
+            'file_types': ['.conf'],
+            'hash_algorithm': 'sha256',
+            'check_interval': 60,
+            'baseline_db': os.path.join(workdir, 'baseline.db'),
+            # canais desligados não podem carregar requests/smtplib
+            'alert_methods': {
+                'telegram': {'enabled': False, 'bot_token': '', 'chat_id': ''},
+                'email': {'enabled': False, 'smtp_server': '', 'smtp_port': 587,
+                          'username': '', 'password': ''}
+            }
+        }, f)
+    run_python("from src.monitor import FileIntegrityMonitor\n"
+               "FileIntegrityMonitor('config.yaml').create_baseline()\n", workdir)
+
+
+def run_python(code, workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env,
+                            capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else
+                           f"código de saída {result.returncode}")
+    return seconds, result.stdout
+
+
+def measure(name, workdir, runs):
+    code, light = CASES[name]
+    samples = []
+    heavy = []
+    try:
+        run_python(code, workdir)  # aquece o cache de bytecode
+        for _ in range(runs):
+            seconds, output = run_python(code + REPORT_MODULES, workdir)
+            samples.append(seconds)
+            heavy = json.loads(output.strip().splitlines()[-1])
+    except RuntimeError as e:
+        return {'case': name, 'skipped': str(e)}
+
+    baseline_seconds, _ = run_python("pass\n", workdir)
+    return {
+        'case': name,
+        'min': min(samples),
+        'p50': statistics.median(samples),
+        'max': max(samples),
+        'interpreter_seconds': baseline_seconds,
+        'heavy_modules': heavy,
+        'light': light
+    }
+
+
+def compare(results, reference, tolerance):
+    """Regressões de p50 acima da tolerância em relação à referência"""
+    previous = {r['case']: r for r in reference['results'] if 'skipped' not in r}
+    regressions = []
+    for result in results:
+        old = previous.get(result['case'])
+        if old is None or 'skipped' in result:
+            continue
+        change = (result['p50'] - old['p50']) / old['p50']
+        if change > tolerance:
+            regressions.append({'benchmark': result['case'], 'metric': 'p50',
+                                'reference': old['p50'], 'current': result['p50'],
+                                'change': change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do PyWatchdog")
+    parser.add_argument('--runs', type=int, default=10, help="execuções medidas por caso")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--output', help="grava os resultados em JSON neste arquivo")
+    parser.add_argument('--compare', help="JSON de uma execução de referência")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="aumento relativo de p50 aceito antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='pywatchdog-startup-')
+    try:
+        prepare(workdir)
+        results = []
+        for name in args.cases:
+            result = measure(name, workdir, args.runs)
+            results.append(result)
+            if 'skipped' in result:
+                print(f"{name:24s} ignorado ({result['skipped']})", file=sys.stderr)
+            else:
+                print(f"{name:24s} p50 {result['p50'] * 1000:7.1f} ms "
+                      f"(interpretador {result['interpreter_seconds'] * 1000:.1f} ms) "
+                      f"pesados: {', '.join(result['heavy_modules']) or '-'}", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs
+        },
+        'results': results,
+        'heavy_imports': [r['case'] for r in results if r.get('light') and r.get('heavy_modules')]
+    }
+    for name in report['heavy_imports']:
+        print(f"ERRO {name} importou módulos pesados", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            report['regressions'] = compare(results, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"REGRESSÃO {regression['benchmark']}: {regression['reference'] * 1000:.1f} ms "
+                  f"-> {regression['current'] * 1000:.1f} ms ({regression['change']:+.0%})",
+                  file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if report['heavy_imports'] or report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
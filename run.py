@@ -7,8 +7,11 @@ Arquivo principal de execução
 import os
 import sys
 import logging
+import importlib.util
 from flask import Flask
 
+from src import web_dashboard
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +26,8 @@ logger = logging.getLogger(__name__)
 
 
 app = Flask(__name__)
+# /api/* e /metrics são as mesmas rotas do dashboard
+app.register_blueprint(web_dashboard.api)
 
 class Config:
     host = '127.0.0.1'
@@ -47,33 +52,29 @@ def setup_directories():
         logger.info(f"Diretório criado/verificado: {directory}")
 
 def check_dependencies():
-    """Verifica se todas as dependências estão instaladas"""
-    try:
-        import flask
-        import yaml
-        from Crypto.PublicKey import RSA
-        import watchdog
-        logger.info("Todas as dependências estão instaladas")
-        return True
-    except ImportError as e:
-        logger.error(f"Dependência missing: {e}")
-        print(f"Erro: {e}")
+    """Verifica se todas as dependências estão instaladas
+
+    Usa importlib.util.find_spec, que localiza os pacotes sem importá-los.
+    """
+    missing = [name for name in ('flask', 'yaml', 'Crypto', 'watchdog')
+               if importlib.util.find_spec(name) is None]
+    if missing:
+        logger.error(f"Dependência missing: {', '.join(missing)}")
+        print(f"Erro: dependências ausentes: {', '.join(missing)}")
         print("Instale as dependências com: pip install -r requirements.txt")
         return False
+    logger.info("Todas as dependências estão instaladas")
+    return True
 
 def load_monitoring_data():
     """Carrega dados de monitoramento"""
-    return {
-        'total_files': 0,
-        'unchanged_files': 0,
-        'modified_files': 0,
-        'deleted_files': 0,
-        'critical_alerts': 0,
-        'total_alerts': 0
-    }
-
-def start_monitoring():
-    """Inicia monitoramento em background"""
+    return web_dashboard.load_monitoring_data()
+
+def start_monitoring(config_path="config/config.yaml"):
+    """Inicia monitoramento em background, compartilhado com as rotas da API"""
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Configuração não encontrada: {config_path}")
+    web_dashboard.start_monitoring(config_path)
     logger.info("Monitoramento em background iniciado")
 
 
@@ -87,14 +88,6 @@ def dashboard():
     stats = load_monitoring_data()
     return f"Dashboard - Arquivos: {stats['total_files']}"
 
-@app.route('/api/verify', methods=['POST'])
-def api_verify():
-    return {'success': True, 'message': 'Verificação iniciada'}
-
-@app.route('/api/export')
-def api_export():
-    return {'success': True, 'data': []}
-
 def main():
     """Função principal"""
     print("=" * 50)
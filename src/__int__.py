@@ -7,11 +7,31 @@ __version__ = "1.0.0"
 __author__ = "Will"
 __description__ = "Sistema de monitoramento de integridade de arquivos com Python"
 
+import importlib
+
+# Os subsistemas pesados (Flask, pycryptodome, requests/smtplib) só são
+# importados no primeiro acesso ao nome correspondente
+_LAZY_EXPORTS = {
+    'FileIntegrityMonitor': '.monitor',
+    'AdvancedHasher': '.hasher',
+    'AlertSystem': '.alerts',
+    'app': '.web_dashboard',
+    'config': '.web_dashboard',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __package__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
 
-from .monitor import FileIntegrityMonitor
-from .hasher import AdvancedHasher
-from .alerts import AlertSystem
-from .web_dashboard import app, config
 
 __all__ = [
     'FileIntegrityMonitor',
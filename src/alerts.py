@@ -1,31 +1,66 @@
-import requests
-import smtplib
+import time
 from email.mime.text import MIMEText
 
+try:
+    from .dispatcher import AlertDispatcher
+    from .channels import ChannelMetrics, SMTPClient, TelegramClient
+    from .metrics import metrics
+except ImportError:
+    from dispatcher import AlertDispatcher
+    from channels import ChannelMetrics, SMTPClient, TelegramClient
+    from metrics import metrics
+
 class AlertSystem:
     def __init__(self, config):
         self.config = config
+        self.dispatcher = None
+        self.metrics = ChannelMetrics()
+        self.telegram_client = None
+        self.smtp_client = None
+    
+    def get_telegram_client(self):
+        """Cliente Telegram reutilizado entre envios (keep-alive)"""
+        if self.telegram_client is None:
+            telegram_config = self.config['alert_methods']['telegram']
+            self.telegram_client = TelegramClient(
+                telegram_config['bot_token'],
+                telegram_config.get('api_url', 'https://api.telegram.org')
+            )
+        return self.telegram_client
+    
+    def get_smtp_client(self):
+        """Conexão SMTP persistente, com reconexão em caso de falha"""
+        if self.smtp_client is None:
+            email_config = self.config['alert_methods']['email']
+            self.smtp_client = SMTPClient(
+                email_config['smtp_server'],
+                email_config['smtp_port'],
+                email_config['username'],
+                email_config.get('password'),
+                starttls=email_config.get('starttls', True)
+            )
+        return self.smtp_client
     
     def send_telegram_alert(self, message):
         if self.config['alert_methods']['telegram']['enabled']:
-            bot_token = self.config['alert_methods']['telegram']['bot_token']
             chat_id = self.config['alert_methods']['telegram']['chat_id']
-            
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
             payload = {
                 'chat_id': chat_id,
                 'text': message
             }
             
+            start = time.perf_counter()
             try:
-                response = requests.post(url, data=payload)
-                return response.status_code == 200
+                ok = self.get_telegram_client().send(payload)
             except Exception as e:
                 print(f"Erro ao enviar alerta Telegram: {e}")
-                return False
+                ok = False
+            self.metrics.record('telegram', time.perf_counter() - start, ok)
+            return ok
     
     def send_email_alert(self, subject, message):
         if self.config['alert_methods']['email']['enabled']:
+            start = time.perf_counter()
             try:
                 email_config = self.config['alert_methods']['email']
                 msg = MIMEText(message)
@@ -33,20 +68,12 @@ class AlertSystem:
                 msg['From'] = email_config['username']
                 msg['To'] = email_config['username']
                 
-                with smtplib.SMTP(
-                    email_config['smtp_server'],
-                    email_config['smtp_port']
-                ) as server:
-                    server.starttls()
-                    server.login(
-                        email_config['username'],
-                        email_config['password']
-                    )
-                    server.send_message(msg)
-                return True
+                ok = self.get_smtp_client().send_message(msg)
             except Exception as e:
                 print(f"Erro ao enviar email: {e}")
-                return False
+                ok = False
+            self.metrics.record('email', time.perf_counter() - start, ok)
+            return ok
     
     def send_console_alert(self, message):
         print(f"🔔 ALERTA: {message}")
@@ -59,3 +86,45 @@ class AlertSystem:
             return self.send_email_alert(subject, message)
         else:
             return self.send_console_alert(message)
+    
+    def start_dispatcher(self):
+        """Inicia o despacho assíncrono para os canais habilitados"""
+        if self.dispatcher is None:
+            methods = self.config['alert_methods']
+            senders = {}
+            if methods.get('telegram', {}).get('enabled'):
+                senders['telegram'] = lambda subject, message: self.send_telegram_alert(message)
+            if methods.get('email', {}).get('enabled'):
+                senders['email'] = self.send_email_alert
+            if methods.get('console', {}).get('enabled'):
+                senders['console'] = lambda subject, message: self.send_console_alert(message)
+            self.dispatcher = AlertDispatcher.from_config(senders, self.config).start()
+            metrics.alert_queue_depth.callback = self.queue_depth_samples
+        return self.dispatcher
+    
+    def queue_depth_samples(self):
+        """Profundidade das filas do dispatcher no formato do Gauge de métricas"""
+        if self.dispatcher is None:
+            return []
+        return [({'channel': channel}, depth)
+                for channel, depth in self.dispatcher.queue_depth().items()]
+    
+    def enqueue_alert(self, subject, message, file_path=None, alert_type=None):
+        """Enfileira o alerta sem esperar pela entrega"""
+        channels = [alert_type] if alert_type else None
+        return self.start_dispatcher().submit(subject, message, file_path, channels)
+    
+    def stop_dispatcher(self, timeout=None):
+        if self.dispatcher:
+            self.dispatcher.stop(timeout)
+            self.dispatcher = None
+        self.close()
+    
+    def close(self):
+        """Fecha as conexões mantidas com os canais"""
+        if self.smtp_client:
+            self.smtp_client.close()
+            self.smtp_client = None
+        if self.telegram_client:
+            self.telegram_client.close()
+            self.telegram_client = None
@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import threading
+import logging
+
+
+class BaselineStore:
+    """Armazenamento persistente da baseline em SQLite (modo WAL)
+
+    Cada linha guarda a entrada da baseline (hash, mtime, tamanho) e a última
+    observação do arquivo (assinatura do os.stat e hash correspondente), o que
+    permite retomar o monitoramento sem rehashear a árvore inteira.
+    """
+
+    # colunas adicionadas depois da primeira versão do esquema
+    EXTRA_COLUMNS = [('mtime_ns', 'INTEGER'), ('tier', 'TEXT'), ('fingerprint', 'TEXT')]
+
+    def __init__(self, db_path='data/baseline.db', batch_size=5000, readonly=False):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+        if readonly:
+            # leitores sem monitor (dashboard): sem DDL nem migração do esquema
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True,
+                                        check_same_thread=False)
+            return
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS baseline (
+                path TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                last_modified REAL,
+                size INTEGER,
+                st_size INTEGER,
+                st_mtime_ns INTEGER,
+                st_ino INTEGER,
+                st_ctime_ns INTEGER,
+                seen_hash TEXT,
+                mtime_ns INTEGER,
+                tier TEXT,
+                fingerprint TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                type TEXT,
+                severity TEXT,
+                file_path TEXT,
+                message TEXT
+            )
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(baseline)")]
+        for column, column_type in self.EXTRA_COLUMNS:
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE baseline ADD COLUMN {column} {column_type}")
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM baseline").fetchone()[0]
+
+    def get(self, path):
+        """Retorna a entrada da baseline para um caminho ou None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT hash, last_modified, size, mtime_ns, tier, fingerprint "
+                "FROM baseline WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._entry(*row)
+
+    @staticmethod
+    def _entry(file_hash, last_modified, size, mtime_ns, tier, fingerprint):
+        entry = {'hash': file_hash, 'last_modified': last_modified, 'size': size}
+        if mtime_ns is not None:
+            entry['mtime_ns'] = mtime_ns
+        if tier is not None:
+            entry['tier'] = tier
+            entry['fingerprint'] = fingerprint
+        return entry
+
+    def load(self, baseline=None, stat_cache=None):
+        """Carrega (baseline, stat_cache) completos do banco
+
+        Os contêineres de destino podem ser informados (ex.: CompactBaseline).
+        """
+        baseline = {} if baseline is None else baseline
+        stat_cache = {} if stat_cache is None else stat_cache
+        with self._lock:
+            cursor = self.conn.execute(
+                "SELECT path, hash, last_modified, size, mtime_ns, tier, fingerprint, "
+                "st_size, st_mtime_ns, st_ino, st_ctime_ns, seen_hash FROM baseline"
+            )
+            for row in cursor:
+                path = row[0]
+                baseline[path] = self._entry(*row[1:7])
+                st_size, st_mtime_ns, st_ino, st_ctime_ns, seen_hash = row[7:]
+                if seen_hash is not None:
+                    stat_cache[path] = ((st_size, st_mtime_ns, st_ino, st_ctime_ns), seen_hash)
+        logging.info(f"Baseline carregada de {self.db_path}: {len(baseline)} arquivos")
+        return baseline, stat_cache
+
+    @staticmethod
+    def _row(path, entry, observed):
+        signature, seen_hash = observed if observed else ((None,) * 4, None)
+        return (path, entry['hash'], entry['last_modified'], entry['size'],
+                *signature, seen_hash, entry.get('mtime_ns'),
+                entry.get('tier'), entry.get('fingerprint'))
+
+    def _executemany_batched(self, sql, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.conn.executemany(sql, batch)
+                batch = []
+        if batch:
+            self.conn.executemany(sql, batch)
+
+    def replace_all(self, baseline, stat_cache):
+        """Substitui toda a baseline persistida em uma única transação"""
+        rows = (self._row(path, entry, stat_cache.get(path))
+                for path, entry in baseline.items())
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM baseline")
+            self._executemany_batched(
+                "INSERT INTO baseline VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def upsert_entries(self, baseline, stat_cache, paths):
+        """Grava (insere ou atualiza) somente as entradas informadas"""
+        rows = (self._row(path, baseline[path], stat_cache.get(path))
+                for path in paths if path in baseline)
+        with self._lock, self.conn:
+            self._executemany_batched(
+                "INSERT OR REPLACE INTO baseline VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def update_observed(self, stat_cache, paths):
+        """Atualiza apenas a última observação (assinatura e hash) dos caminhos"""
+        def rows():
+            for path in paths:
+                signature, seen_hash = stat_cache.get(path, ((None,) * 4, None))
+                yield (*signature, seen_hash, path)
+
+        with self._lock, self.conn:
+            self._executemany_batched(
+                "UPDATE baseline SET st_size = ?, st_mtime_ns = ?, st_ino = ?, "
+                "st_ctime_ns = ?, seen_hash = ? WHERE path = ?", rows()
+            )
+
+    def record_alerts(self, alerts):
+        """Acrescenta alertas ao histórico em uma única transação"""
+        rows = ((a['timestamp'], a['type'], a['severity'], a['file_path'], a['message'])
+                for a in alerts)
+        with self._lock, self.conn:
+            self._executemany_batched(
+                "INSERT INTO alerts (timestamp, type, severity, file_path, message) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def _read_connection(self):
+        # conexão própria: no modo WAL leitores longos não bloqueiam o monitor
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def iter_entries(self, batch_size=1000):
+        """Percorre a baseline em lotes, sem carregá-la inteira na memória"""
+        conn = self._read_connection()
+        try:
+            cursor = conn.execute(
+                "SELECT path, hash, last_modified, size, mtime_ns, tier, fingerprint "
+                "FROM baseline ORDER BY path"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    entry = self._entry(*row[1:])
+                    entry['path'] = row[0]
+                    yield entry
+        finally:
+            conn.close()
+
+    def iter_alerts(self, batch_size=1000):
+        """Percorre o histórico de alertas em ordem cronológica"""
+        conn = self._read_connection()
+        try:
+            cursor = conn.execute(
+                "SELECT timestamp, type, severity, file_path, message FROM alerts ORDER BY id"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(('timestamp', 'type', 'severity', 'file_path', 'message'), row))
+        finally:
+            conn.close()
+
+    def delete_entries(self, paths):
+        with self._lock, self.conn:
+            self._executemany_batched(
+                "DELETE FROM baseline WHERE path = ?", ((path,) for path in paths)
+            )
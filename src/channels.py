@@ -0,0 +1,121 @@
+import logging
+import threading
+
+try:
+    from .metrics import metrics
+except ImportError:
+    from metrics import metrics
+
+
+class ChannelMetrics:
+    """Latência de envio por canal (contagem, total, máximo e erros)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def record(self, channel, seconds, ok=True):
+        with self._lock:
+            data = self._channels.setdefault(
+                channel, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+            )
+            data['count'] += 1
+            if not ok:
+                data['errors'] += 1
+            data['total'] += seconds
+            data['max'] = max(data['max'], seconds)
+            data['last'] = seconds
+        if metrics.enabled:
+            metrics.alert_send_seconds.observe(seconds, channel=channel,
+                                               result='ok' if ok else 'error')
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                channel: dict(data, avg=data['total'] / data['count'] if data['count'] else 0.0)
+                for channel, data in self._channels.items()
+            }
+
+
+class SMTPClient:
+    """Conexão SMTP persistente com STARTTLS/login feitos uma única vez
+
+    Se o servidor derrubar a conexão, ela é refeita e o envio repetido uma vez.
+    """
+
+    def __init__(self, server, port=587, username=None, password=None,
+                 starttls=True, timeout=30):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import smtplib
+
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.password:
+            smtp.login(self.username, self.password)
+        self._smtp = smtp
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def send_message(self, msg):
+        import smtplib
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._smtp is None:
+                        self._connect()
+                    self._smtp.send_message(msg)
+                    return True
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+                    self._close()
+                    if attempt:
+                        raise
+                    logging.warning(f"Conexão SMTP perdida, reconectando: {e}")
+
+
+class TelegramClient:
+    """Cliente HTTP com requests.Session (keep-alive e pool de conexões)
+
+    requests só é importado ao criar o cliente, no primeiro envio.
+    """
+
+    def __init__(self, bot_token, api_url='https://api.telegram.org', timeout=10, pool_size=4):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = f"{api_url}/bot{bot_token}/sendMessage"
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def send(self, payload, as_json=False):
+        if as_json:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        else:
+            response = self.session.post(self.url, data=payload, timeout=self.timeout)
+        return response.status_code == 200
+
+    def close(self):
+        self.session.close()
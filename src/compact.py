@@ -0,0 +1,157 @@
+import sys
+from collections.abc import MutableMapping
+
+
+def _digest_bytes(digest):
+    """Converte o hash hexadecimal em bytes brutos (metade do tamanho)"""
+    try:
+        return bytes.fromhex(digest)
+    except (TypeError, ValueError):
+        return digest
+
+
+def _digest_hex(digest):
+    return digest.hex() if isinstance(digest, bytes) else digest
+
+
+class PrefixMap(MutableMapping):
+    """Mapeamento caminho -> valor com prefixos de diretório internados
+
+    Os caminhos são guardados como {prefixo: {nome: registro}}, de modo que
+    cada diretório é armazenado uma única vez (com sys.intern, para que o
+    FileIndex reaproveite a mesma string). Subclasses definem como o
+    valor é compactado em um registro (_encode) e reconstruído (_decode).
+    """
+
+    def __init__(self, data=None):
+        self._dirs = {}
+        self._len = 0
+        if data:
+            self.update(data)
+
+    @staticmethod
+    def _split(path):
+        path = str(path)
+        index = path.rfind('/') + 1
+        return path[:index], path[index:]
+
+    def _encode(self, value):
+        return value
+
+    def _decode(self, record):
+        return record
+
+    def __getitem__(self, path):
+        prefix, name = self._split(path)
+        try:
+            return self._decode(self._dirs[prefix][name])
+        except KeyError:
+            raise KeyError(path) from None
+
+    def __setitem__(self, path, value):
+        prefix, name = self._split(path)
+        names = self._dirs.get(prefix)
+        if names is None:
+            names = self._dirs[sys.intern(prefix)] = {}
+        if name not in names:
+            self._len += 1
+        names[name] = self._encode(value)
+
+    def __delitem__(self, path):
+        prefix, name = self._split(path)
+        try:
+            names = self._dirs[prefix]
+            del names[name]
+        except KeyError:
+            raise KeyError(path) from None
+        self._len -= 1
+        if not names:
+            del self._dirs[prefix]
+
+    def __contains__(self, path):
+        prefix, name = self._split(path)
+        names = self._dirs.get(prefix)
+        return names is not None and name in names
+
+    def __iter__(self):
+        for prefix, names in self._dirs.items():
+            for name in names:
+                yield prefix + name
+
+    def __len__(self):
+        return self._len
+
+    def split_keys(self):
+        """Pares (prefixo, nome) com as próprias strings guardadas no mapa"""
+        for prefix, names in self._dirs.items():
+            for name in names:
+                yield prefix, name
+
+    def items(self):
+        for prefix, names in self._dirs.items():
+            for name, record in names.items():
+                yield prefix + name, self._decode(record)
+
+    def clear(self):
+        self._dirs.clear()
+        self._len = 0
+
+
+class BaselineRecord:
+    __slots__ = ('digest', 'mtime', 'size', 'fingerprint')
+
+    def __init__(self, digest, mtime, size, fingerprint=None):
+        self.digest = digest
+        self.mtime = mtime
+        self.size = size
+        self.fingerprint = fingerprint
+
+
+class CompactBaseline(PrefixMap):
+    """Baseline compacta: hash em bytes, mtime inteiro (ns) e __slots__
+
+    Continua retornando entradas no formato {'hash', 'last_modified', 'size'}.
+    """
+
+    def _encode(self, entry):
+        mtime = entry.get('mtime_ns')
+        if mtime is None:
+            mtime = entry['last_modified']
+        fingerprint = entry.get('fingerprint') if entry.get('tier') == 'sample' else None
+        return BaselineRecord(_digest_bytes(entry['hash']), mtime, entry['size'],
+                              _digest_bytes(fingerprint) if fingerprint else None)
+
+    def _decode(self, record):
+        entry = {'hash': _digest_hex(record.digest), 'size': record.size}
+        if isinstance(record.mtime, int):
+            entry['last_modified'] = record.mtime / 1e9
+            entry['mtime_ns'] = record.mtime
+        else:
+            entry['last_modified'] = record.mtime
+        if record.fingerprint is not None:
+            entry['tier'] = 'sample'
+            entry['fingerprint'] = _digest_hex(record.fingerprint)
+        return entry
+
+
+class StatRecord:
+    __slots__ = ('size', 'mtime_ns', 'ino', 'ctime_ns', 'digest')
+
+    def __init__(self, size, mtime_ns, ino, ctime_ns, digest):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+        self.ctime_ns = ctime_ns
+        self.digest = digest
+
+
+class CompactStatCache(PrefixMap):
+    """Cache compacta de (assinatura do os.stat, hash) por caminho"""
+
+    def _encode(self, value):
+        signature, digest = value
+        return StatRecord(*signature, _digest_bytes(digest))
+
+    def _decode(self, record):
+        signature = (record.size, record.mtime_ns, record.ino, record.ctime_ns)
+        return signature, _digest_hex(record.digest)
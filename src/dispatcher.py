@@ -0,0 +1,177 @@
+import os
+import time
+import queue
+import logging
+import threading
+
+_STOP = object()
+
+
+class RateLimiter:
+    """Token bucket simples: até 'rate' envios a cada 'period' segundos"""
+
+    def __init__(self, rate, period=60.0):
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def acquire(self):
+        """Bloqueia até haver um token disponível"""
+        if not self.rate:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) * self.period / self.rate)
+
+
+class AlertDispatcher:
+    """Despacho assíncrono de alertas com fila limitada por canal
+
+    Cada canal tem sua própria thread e fila. Alertas que chegam dentro de
+    'batch_window' segundos são agrupados por assunto em um único resumo
+    ("4812 arquivos - ARQUIVO MODIFICADO em /srv/app"), os envios respeitam
+    um limite por minuto e falhas são repetidas com backoff exponencial.
+    submit() nunca bloqueia: com a fila cheia o alerta é descartado e contado.
+    """
+
+    def __init__(self, senders, queue_size=10000, batch_window=5.0, max_batch=10000,
+                 rate_limit=30, rate_period=60.0, max_retries=3, backoff=1.0,
+                 digest_lines=20):
+        self.senders = senders
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.digest_lines = digest_lines
+        self.queues = {channel: queue.Queue(maxsize=queue_size) for channel in senders}
+        self.limiters = {channel: RateLimiter(rate_limit, rate_period) for channel in senders}
+        self.stats = {channel: {'queued': 0, 'sent': 0, 'failed': 0, 'dropped': 0}
+                      for channel in senders}
+        self.threads = {}
+
+    @classmethod
+    def from_config(cls, senders, config):
+        """Cria o dispatcher a partir de config['alert_dispatch']"""
+        options = config.get('alert_dispatch') or {}
+        return cls(
+            senders,
+            queue_size=options.get('queue_size', 10000),
+            batch_window=options.get('batch_window', 5.0),
+            max_batch=options.get('max_batch', 10000),
+            rate_limit=options.get('rate_limit', 30),
+            rate_period=options.get('rate_period', 60.0),
+            max_retries=options.get('max_retries', 3),
+            backoff=options.get('backoff', 1.0)
+        )
+
+    def start(self):
+        for channel in self.senders:
+            if channel in self.threads:
+                continue
+            thread = threading.Thread(
+                target=self._worker, args=(channel,), name=f"alert-{channel}", daemon=True
+            )
+            self.threads[channel] = thread
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Envia o que estiver pendente e encerra as threads"""
+        for channel, thread in self.threads.items():
+            self.queues[channel].put(_STOP)
+        for thread in self.threads.values():
+            thread.join(timeout)
+        self.threads = {}
+
+    def queue_depth(self):
+        return {channel: q.qsize() for channel, q in self.queues.items()}
+
+    def submit(self, subject, message, file_path=None, channels=None):
+        """Enfileira um alerta sem bloquear; retorna False se algum canal descartou"""
+        accepted = True
+        for channel in channels or self.queues:
+            q = self.queues.get(channel)
+            if q is None:
+                continue
+            try:
+                q.put_nowait((subject, message, file_path))
+                self.stats[channel]['queued'] += 1
+            except queue.Full:
+                self.stats[channel]['dropped'] += 1
+                accepted = False
+        return accepted
+
+    def _worker(self, channel):
+        q = self.queues[channel]
+        stopping = False
+        while not stopping:
+            item = q.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            for subject, items in self._group(batch).items():
+                self._deliver(channel, *self.format_digest(subject, items))
+
+    @staticmethod
+    def _group(batch):
+        groups = {}
+        for subject, message, file_path in batch:
+            groups.setdefault(subject, []).append((message, file_path))
+        return groups
+
+    def format_digest(self, subject, items):
+        """Monta (assunto, mensagem) para um grupo de alertas do mesmo tipo"""
+        if len(items) == 1:
+            return subject, items[0][0]
+
+        paths = [file_path for _, file_path in items if file_path]
+        location = ''
+        if paths:
+            try:
+                location = f" em {os.path.commonpath(paths)}"
+            except ValueError:
+                pass
+
+        lines = [message for message, _ in items[:self.digest_lines]]
+        if len(items) > self.digest_lines:
+            lines.append(f"... e mais {len(items) - self.digest_lines}")
+        header = f"{len(items)} arquivos - {subject}{location}"
+        return f"{subject} ({len(items)} arquivos)", header + "\n" + "\n".join(lines)
+
+    def _deliver(self, channel, subject, message):
+        send = self.senders[channel]
+        for attempt in range(self.max_retries + 1):
+            self.limiters[channel].acquire()
+            try:
+                if send(subject, message):
+                    self.stats[channel]['sent'] += 1
+                    return True
+            except Exception as e:
+                logging.error(f"Erro ao enviar alerta via {channel}: {e}")
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+
+        self.stats[channel]['failed'] += 1
+        logging.error(f"Alerta descartado após {self.max_retries} tentativas via {channel}")
+        return False
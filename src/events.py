@@ -0,0 +1,98 @@
+import time
+import threading
+import logging
+
+
+class EventQueue:
+    """Fila de caminhos alterados com coalescência e debounce
+
+    Eventos repetidos do mesmo caminho são agrupados em uma única entrada;
+    o caminho só é liberado depois de 'debounce' segundos sem novos eventos
+    ou após 'max_delay' segundos desde o primeiro evento. Se a fila passar
+    de 'max_size' caminhos, é marcada como estourada e o chamador deve fazer
+    uma varredura completa.
+    """
+
+    def __init__(self, debounce=0.5, max_delay=5.0, max_size=100000):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self.overflowed = False
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, path, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if path in self._pending:
+                self._pending[path][1] = now
+            elif len(self._pending) >= self.max_size:
+                self.overflowed = True
+            else:
+                self._pending[path] = [now, now]
+
+    def mark_overflow(self):
+        with self._lock:
+            self.overflowed = True
+
+    def pop_ready(self, now=None):
+        """Remove e retorna os caminhos prontos para verificação"""
+        now = time.monotonic() if now is None else now
+        ready = []
+        with self._lock:
+            for path, (first_seen, last_seen) in self._pending.items():
+                if now - last_seen >= self.debounce or now - first_seen >= self.max_delay:
+                    ready.append(path)
+            for path in ready:
+                del self._pending[path]
+        return ready
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self.overflowed = False
+
+
+class ChangeEventHandler:
+    """Encaminha eventos do watchdog para a EventQueue
+
+    Implementa só dispatch(), a interface que o Observer usa, para que o
+    watchdog seja importado apenas quando o modo por eventos é iniciado.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def dispatch(self, event):
+        self.on_any_event(event)
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            # Diretórios movidos/removidos não geram eventos por arquivo
+            if event.event_type in ('moved', 'deleted'):
+                self.queue.mark_overflow()
+            return
+
+        self.queue.push(event.src_path)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.queue.push(dest_path)
+
+
+def start_observer(directories, queue):
+    """Inicia um Observer do watchdog sobre os diretórios informados"""
+    try:
+        from watchdog.observers import Observer
+    except ImportError:
+        raise ImportError("watchdog não está instalado")
+
+    handler = ChangeEventHandler(queue)
+    observer = Observer()
+    for directory in directories:
+        observer.schedule(handler, directory, recursive=True)
+    observer.start()
+    logging.info(f"Observer de eventos iniciado em {len(directories)} diretórios")
+    return observer
@@ -0,0 +1,131 @@
+import io
+import csv
+import json
+import zlib
+
+BASELINE_FIELDS = ['path', 'status', 'hash', 'size', 'last_modified', 'tier']
+REPORT_FIELDS = ['path', 'status', 'hash', 'observed_hash']
+ALERT_FIELDS = ['timestamp', 'type', 'severity', 'file_path', 'message']
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+
+def csv_lines(records, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def chunked(lines, chunk_size=65536):
+    """Agrupa linhas em blocos de ~chunk_size bytes para reduzir o overhead"""
+    parts = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzip_stream(chunks, level=6):
+    """Comprime um fluxo de blocos em gzip sem materializar o conteúdo"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(records, fmt='ndjson', fields=None, compress=False):
+    """Gera os bytes de uma exportação em NDJSON ou CSV, opcionalmente gzip"""
+    if fmt == 'csv':
+        lines = csv_lines(records, fields)
+    elif fmt == 'ndjson':
+        lines = ndjson_lines(records)
+    else:
+        raise ValueError(f"Formato de exportação inválido: {fmt}")
+
+    chunks = chunked(lines)
+    return gzip_stream(chunks) if compress else chunks
+
+
+def iter_indexed_baseline(monitor, page_size=1000):
+    """Percorre a baseline do monitor em páginas do FileIndex
+
+    Cada página é lida sob o state_lock do monitor, então a varredura pode
+    continuar alterando a baseline durante uma exportação longa.
+    """
+    cursor = None
+    while True:
+        with monitor.state_lock:
+            page = monitor.file_index.page(monitor.baseline, limit=page_size, cursor=cursor)
+        yield from page['files']
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+
+def iter_scan_report(monitor, page_size=1000):
+    """Arquivos com alteração detectada na última varredura, por status e caminho
+
+    Pagina o índice de status do FileIndex como iter_indexed_baseline: o
+    state_lock do monitor só é segurado durante cada página.
+    """
+    for status in sorted(monitor.CHANGE_MESSAGES):
+        cursor = None
+        while True:
+            with monitor.state_lock:
+                page = monitor.file_index.page(monitor.baseline, limit=page_size,
+                                               cursor=cursor, status=status)
+                observed = [monitor.stat_cache.get(record['path']) for record in page['files']]
+            for record, seen in zip(page['files'], observed):
+                yield {
+                    'path': record['path'],
+                    'status': record['status'],
+                    'hash': record['hash'],
+                    'observed_hash': seen[1] if seen else None
+                }
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+
+def export_source(kind, monitor=None, store=None):
+    """Retorna (registros, campos CSV) para o tipo de exportação
+
+    Usa o monitor em execução quando disponível; caso contrário lê direto
+    do BaselineStore persistido.
+    """
+    if kind == 'baseline':
+        if monitor is not None:
+            return iter_indexed_baseline(monitor), BASELINE_FIELDS
+        if store is not None:
+            return store.iter_entries(), BASELINE_FIELDS
+    elif kind == 'report':
+        if monitor is not None:
+            return iter_scan_report(monitor), REPORT_FIELDS
+    elif kind == 'alerts':
+        store = store or (monitor.store if monitor is not None else None)
+        if store is not None:
+            return store.iter_alerts(), ALERT_FIELDS
+        if monitor is not None:
+            return iter(list(monitor.alert_history)), ALERT_FIELDS
+    else:
+        raise ValueError(f"Tipo de exportação inválido: {kind}")
+    fields = {'baseline': BASELINE_FIELDS, 'report': REPORT_FIELDS, 'alerts': ALERT_FIELDS}
+    return iter(()), fields[kind]
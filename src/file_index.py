@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import base64
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+
+
+def _joined(key):
+    return key[0] + key[1]
+
+
+class FileIndex:
+    """Índices sobre a baseline para listagem paginada por cursor
+
+    Mantém os caminhos ordenados (o que torna o filtro por diretório um
+    intervalo contíguo), listas ordenadas por extensão e por status
+    (alimentadas por set_status a cada transição do monitor) e, sob demanda,
+    ordenações por tamanho e data de modificação, atualizadas entrada a
+    entrada depois de construídas. Cada página custa uma busca binária mais
+    o tamanho da página, independente do total, e só lê estruturas do
+    próprio índice, sob o seu lock. Com filtro, a ordenação por tamanho/data
+    usa só os candidatos do filtro quando eles são poucos.
+
+    Sobre uma baseline compacta (PrefixMap), os caminhos são guardados como
+    (prefixo, nome) com as strings da própria baseline, ordenados pelo
+    caminho completo, em vez de uma cópia de cada caminho.
+    """
+
+    SORT_KEYS = ('path', 'size', 'last_modified')
+    # filtro com mais de 1/DENSE_RATIO do índice usa a ordenação global
+    DENSE_RATIO = 16
+    PREPARE_CHUNK = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._paths = []
+        self._by_ext = {}
+        self._status = {}
+        self._by_status = {}
+        self._sorted = {}
+        self._pending = {}
+        self._join = None
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._paths)
+
+    @staticmethod
+    def _ext(path):
+        return os.path.splitext(path)[1].lower()
+
+    def _path(self, key):
+        return self._join(key) if self._join else key
+
+    def _key(self, path):
+        if self._join is None:
+            return path
+        index = path.rfind('/') + 1
+        return sys.intern(path[:index]), path[index:]
+
+    def rebuild(self, baseline):
+        if hasattr(baseline, 'split_keys'):
+            join = _joined
+            keys = sorted(baseline.split_keys(), key=join)
+        else:
+            join = None
+            keys = sorted(baseline)
+        by_ext = {}
+        for key in keys:
+            by_ext.setdefault(self._ext(key[1] if join else key), []).append(key)
+        with self._lock:
+            self._paths = keys
+            self._by_ext = by_ext
+            self._join = join
+            self._status = {}
+            self._by_status = {}
+            self._sorted = {}
+            self._generation += 1
+
+    @staticmethod
+    def _discard(items, item, key=None):
+        index = bisect_left(items, item, key=key)
+        if index < len(items) and (key(items[index]) if key else items[index]) == item:
+            del items[index]
+
+    def add(self, path, entry=None):
+        """Inclui o caminho ou, se já existir, atualiza suas chaves de ordenação
+
+        Sem entry, as ordenações por tamanho/data são descartadas e
+        reconstruídas na próxima página que as usar.
+        """
+        with self._lock:
+            index = bisect_left(self._paths, path, key=self._join)
+            if index == len(self._paths) or self._path(self._paths[index]) != path:
+                key = self._key(path)
+                self._paths.insert(index, key)
+                insort(self._by_ext.setdefault(self._ext(path), []), key, key=self._join)
+            for changed in self._pending.values():
+                changed.add(path)
+            if entry is None:
+                self._sorted = {}
+                return
+            for sort, (keyed, keys) in self._sorted.items():
+                key = entry.get(sort) or 0
+                old = keys.get(path)
+                if old == key:
+                    continue
+                if old is not None:
+                    self._discard(keyed, (old, path))
+                insort(keyed, (key, path))
+                keys[path] = key
+
+    def remove(self, path):
+        with self._lock:
+            self._discard(self._paths, path, self._join)
+            self._discard(self._by_ext.get(self._ext(path), []), path, self._join)
+            self._set_status(path, 'unchanged')
+            for changed in self._pending.values():
+                changed.add(path)
+            for keyed, keys in self._sorted.values():
+                old = keys.pop(path, None)
+                if old is not None:
+                    self._discard(keyed, (old, path))
+
+    def set_status(self, path, status):
+        """Registra a transição de status do caminho ('unchanged' remove)"""
+        with self._lock:
+            self._set_status(path, status)
+
+    def _set_status(self, path, status):
+        old = self._status.get(path, 'unchanged')
+        if old == status:
+            return
+        if old != 'unchanged':
+            self._discard(self._by_status[old], path)
+        if status == 'unchanged':
+            del self._status[path]
+        else:
+            self._status[path] = status
+            insort(self._by_status.setdefault(status, []), path)
+
+    def prepare(self, sort, baseline, state_lock):
+        """Constrói a ordenação por sort sem segurar state_lock durante o sort
+
+        As chaves são lidas da baseline em blocos de PREPARE_CHUNK caminhos,
+        cada bloco sob state_lock; o sort roda sem lock e os caminhos
+        alterados nesse intervalo são reaplicados na troca. Chamado antes de
+        page() para que a primeira página por tamanho/data não pare o monitor.
+        """
+        if sort == 'path' or sort not in self.SORT_KEYS:
+            return
+        with self._build_lock:
+            with self._lock:
+                if sort in self._sorted:
+                    return
+                generation = self._generation
+                paths = list(self._paths)
+                join = self._join
+                self._pending[sort] = set()
+            keys = {}
+            for start in range(0, len(paths), self.PREPARE_CHUNK):
+                with state_lock:
+                    for path in paths[start:start + self.PREPARE_CHUNK]:
+                        if join:
+                            path = join(path)
+                        entry = baseline.get(path)
+                        if entry is not None:
+                            keys[path] = entry.get(sort) or 0
+            keyed = sorted((key, path) for path, key in keys.items())
+            with state_lock, self._lock:
+                changed = self._pending.pop(sort, ())
+                if generation != self._generation:
+                    return
+                for path in changed:
+                    old = keys.pop(path, None)
+                    if old is not None:
+                        self._discard(keyed, (old, path))
+                    entry = baseline.get(path)
+                    if entry is not None:
+                        keys[path] = entry.get(sort) or 0
+                        insort(keyed, (keys[path], path))
+                self._sorted[sort] = (keyed, keys)
+
+    def _sorted_by(self, sort, baseline):
+        """Lista (chave, caminho) ordenada, construída uma vez por versão da baseline"""
+        cached = self._sorted.get(sort)
+        if cached is None:
+            keys = {}
+            for key in self._paths:
+                path = self._path(key)
+                entry = baseline.get(path)
+                if entry is not None:
+                    keys[path] = entry.get(sort) or 0
+            keyed = sorted((key, path) for path, key in keys.items())
+            cached = self._sorted[sort] = (keyed, keys)
+        return cached[0]
+
+    def _candidates(self, status, extension, directory):
+        """Lista ordenada por caminho do filtro mais seletivo, sua função de
+        junção e o intervalo [lo, hi) do diretório dentro dela"""
+        if status and status != 'unchanged':
+            keys, join = self._by_status.get(status, []), None
+        elif extension:
+            keys, join = self._by_ext.get(extension, []), self._join
+        else:
+            keys, join = self._paths, self._join
+        lo, hi = 0, len(keys)
+        if directory:
+            lo = bisect_left(keys, directory, key=join)
+            hi = bisect_left(keys, directory[:-1] + chr(ord('/') + 1), lo, key=join)
+        return keys, join, lo, hi
+
+    def _filtered_sorted(self, sort, baseline, status, extension, directory):
+        """Ordena por sort só os candidatos do filtro, se forem poucos
+
+        Com candidatos demais retorna None e a página varre a ordenação
+        global, onde um filtro denso acha a página logo no começo.
+        """
+        keys, join, lo, hi = self._candidates(status, extension, directory)
+        if (hi - lo) * self.DENSE_RATIO > len(self._paths):
+            return None
+        keyed = []
+        for index in range(lo, hi):
+            path = join(keys[index]) if join else keys[index]
+            entry = baseline.get(path)
+            if entry is not None:
+                keyed.append((entry.get(sort) or 0, path))
+        keyed.sort()
+        return keyed
+
+    def page(self, baseline, limit=50, cursor=None, status=None,
+             directory=None, extension=None, sort='path', order='asc'):
+        """Retorna {'files': [...], 'next_cursor': ...} para os filtros informados"""
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Ordenação inválida: {sort}")
+        if directory and not directory.endswith('/'):
+            directory += '/'
+        if extension and not extension.startswith('.'):
+            extension = '.' + extension
+        extension = extension.lower() if extension else None
+        descending = order == 'desc'
+        after = decode_cursor(cursor) if cursor else None
+
+        with self._lock:
+            if sort == 'path':
+                keys, join, lo, hi = self._candidates(status, extension, directory)
+                if after is not None:
+                    if descending:
+                        hi = min(hi, bisect_left(keys, after, lo, hi, key=join))
+                    else:
+                        lo = max(lo, bisect_right(keys, after, lo, hi, key=join))
+                candidates = (keys[i] for i in (range(hi - 1, lo - 1, -1) if descending
+                                                else range(lo, hi)))
+                if join:
+                    candidates = map(join, candidates)
+                candidates = ((path, path) for path in candidates)
+            else:
+                keyed = None
+                if status or directory or extension:
+                    keyed = self._filtered_sorted(sort, baseline, status, extension, directory)
+                if keyed is None:
+                    keyed = self._sorted_by(sort, baseline)
+                lo, hi = 0, len(keyed)
+                if after is not None:
+                    after = tuple(after)
+                    if descending:
+                        hi = bisect_left(keyed, after)
+                    else:
+                        lo = bisect_right(keyed, after)
+                indices = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+                candidates = ((list(keyed[i]), keyed[i][1]) for i in indices)
+
+            files = []
+            last_key = None
+            for key, path in candidates:
+                file_state = self._status.get(path, 'unchanged')
+                if status and file_state != status:
+                    continue
+                if directory and not path.startswith(directory):
+                    continue
+                if extension and self._ext(path) != extension:
+                    continue
+                if len(files) == limit:
+                    break
+                entry = baseline.get(path)
+                if entry is None:
+                    continue
+                files.append(self.describe(path, entry, file_state))
+                last_key = key
+            else:
+                last_key = None
+
+        return {
+            'files': files,
+            'next_cursor': encode_cursor(last_key) if last_key is not None else None
+        }
+
+    @staticmethod
+    def describe(path, entry, status):
+        return {
+            'path': path,
+            'status': status,
+            'hash': entry.get('hash'),
+            'size': entry.get('size'),
+            'last_modified': entry.get('last_modified'),
+            'tier': entry.get('tier', 'full')
+        }
@@ -0,0 +1,226 @@
+import os
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+try:
+    from .metrics import metrics
+except ImportError:
+    from metrics import metrics
+
+
+def content_key(stat_info):
+    """Chave do conteúdo de um inode: muda sempre que o arquivo é alterado
+
+    Inclui st_ctime_ns: o mtime pode ser restaurado com os.utime depois de
+    uma alteração do mesmo tamanho, mas o ctime não.
+    """
+    return (stat_info.st_dev, stat_info.st_ino, stat_info.st_size, stat_info.st_mtime_ns,
+            stat_info.st_ctime_ns)
+
+
+class HashCache:
+    """Cache de hashes endereçado por (st_dev, st_ino, st_size, st_mtime_ns, st_ctime_ns)
+
+    Hardlinks e bind mounts do mesmo inode compartilham a chave, então o
+    conteúdo é lido uma única vez por alteração. As entradas são despejadas
+    em ordem LRU acima de max_entries e podem ser persistidas em SQLite.
+    Também mantém o índice reverso hash -> caminhos da baseline.
+    """
+
+    def __init__(self, max_entries=100000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._digest_paths = {}
+        self._path_digest = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o cache a partir de config['hash_cache'] (None se desabilitado)"""
+        options = config.get('hash_cache') or {}
+        if not options.get('enabled'):
+            return None
+        return cls(options.get('max_entries', 100000), options.get('path'))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, stat_info, algorithm):
+        key = (content_key(stat_info), algorithm)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if metrics.enabled:
+            metrics.hash_cache_requests.inc(result='miss' if digest is None else 'hit')
+        return digest
+
+    def put(self, stat_info, algorithm, digest):
+        key = (content_key(stat_info), algorithm)
+        with self._lock:
+            self._entries[key] = digest
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put_if_unchanged(self, file_path, stat_info, digests):
+        """Grava {algoritmo: hash} se o arquivo não mudou desde stat_info
+
+        Evita guardar o hash de um conteúdo que estava sendo escrito durante
+        a leitura.
+        """
+        try:
+            after = os.stat(file_path)
+        except OSError:
+            return False
+        if content_key(after) != content_key(stat_info):
+            return False
+        for algorithm, digest in digests.items():
+            if digest is not None:
+                self.put(stat_info, algorithm, digest)
+        return True
+
+    def get_or_compute(self, file_path, algorithm, compute, stat_info=None, refresh=False):
+        """Retorna o hash do cache ou calcula com compute(file_path)
+
+        Com refresh=True o cache não é consultado (rehash completo), mas o
+        resultado é gravado.
+        """
+        if stat_info is None:
+            try:
+                stat_info = os.stat(file_path)
+            except OSError:
+                return compute(file_path)
+        if not stat_info.st_ino:
+            # sem número de inode (ex.: DirEntry.stat no Windows) a chave não é confiável
+            return compute(file_path)
+
+        if not refresh:
+            digest = self.get(stat_info, algorithm)
+            if digest is not None:
+                return digest
+
+        digest = compute(file_path)
+        if digest is not None:
+            self.put_if_unchanged(file_path, stat_info, {algorithm: digest})
+        return digest
+
+    def index_path(self, path, digest):
+        """Associa um caminho da baseline ao hash do seu conteúdo"""
+        with self._lock:
+            old = self._path_digest.get(path)
+            if old == digest:
+                return
+            if old is not None:
+                self._unindex(path, old)
+            self._path_digest[path] = digest
+            self._digest_paths.setdefault(digest, set()).add(path)
+
+    def unindex_path(self, path):
+        with self._lock:
+            old = self._path_digest.pop(path, None)
+            if old is not None:
+                self._unindex(path, old)
+
+    def _unindex(self, path, digest):
+        paths = self._digest_paths.get(digest)
+        if paths is not None:
+            paths.discard(path)
+            if not paths:
+                del self._digest_paths[digest]
+
+    def reindex(self, baseline):
+        """Reconstrói o índice reverso a partir de uma baseline"""
+        digest_paths = {}
+        path_digest = {}
+        for path, entry in baseline.items():
+            path_digest[path] = entry['hash']
+            digest_paths.setdefault(entry['hash'], set()).add(path)
+        with self._lock:
+            self._digest_paths = digest_paths
+            self._path_digest = path_digest
+
+    def paths_for(self, digest):
+        """Caminhos da baseline que compartilham o conteúdo com este hash"""
+        with self._lock:
+            return sorted(self._digest_paths.get(digest, ()))
+
+    def duplicates(self, min_paths=2):
+        """Gera (hash, caminhos) para conteúdos presentes em min_paths ou mais caminhos"""
+        with self._lock:
+            groups = [(digest, sorted(paths)) for digest, paths in self._digest_paths.items()
+                      if len(paths) >= min_paths]
+        return iter(groups)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'indexed_paths': len(self._path_digest),
+                'distinct_digests': len(self._digest_paths)
+            }
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(hash_cache)")]
+        if columns and 'st_ctime_ns' not in columns:
+            # cache gravado com a chave antiga (sem ctime): descartado
+            conn.execute("DROP TABLE hash_cache")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS hash_cache (
+                st_dev INTEGER,
+                st_ino INTEGER,
+                st_size INTEGER,
+                st_mtime_ns INTEGER,
+                st_ctime_ns INTEGER,
+                algorithm TEXT,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (st_dev, st_ino, st_size, st_mtime_ns, st_ctime_ns, algorithm)
+            )
+        """)
+        return conn
+
+    def load(self):
+        """Carrega as entradas persistidas (as mais recentes por último)"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT st_dev, st_ino, st_size, st_mtime_ns, st_ctime_ns, algorithm, digest "
+                "FROM hash_cache ORDER BY rowid"
+            ).fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            for dev, ino, size, mtime_ns, ctime_ns, algorithm, digest in rows[-self.max_entries:]:
+                self._entries[((dev, ino, size, mtime_ns, ctime_ns), algorithm)] = digest
+        logging.info(f"Cache de hashes carregado com {len(rows)} entradas")
+
+    def save(self):
+        """Grava o conteúdo atual do cache, substituindo o arquivo anterior"""
+        if not self.path:
+            return
+        with self._lock:
+            rows = [key + (algorithm, digest)
+                    for (key, algorithm), digest in self._entries.items()]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM hash_cache")
+                conn.executemany("INSERT INTO hash_cache VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
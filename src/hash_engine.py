@@ -0,0 +1,179 @@
+import os
+import mmap
+import hashlib
+
+KB = 1024
+MB = 1024 * KB
+
+ENGINES = ('auto', 'read', 'readinto', 'mmap', 'file_digest')
+
+
+def new_hash(algorithm):
+    """Cria o objeto de digest: nomes do hashlib (sha256, blake2b, sha3_256...) ou blake3
+
+    blake3 depende do pacote opcional 'blake3'; sem ele, ValueError como
+    em hashlib.new com um algoritmo desconhecido.
+    """
+    algorithm = algorithm.lower()
+    if algorithm == 'blake3':
+        try:
+            from blake3 import blake3
+        except ImportError:
+            raise ValueError("blake3 requer o pacote opcional 'blake3' (pip install blake3)")
+        return blake3()
+    return hashlib.new(algorithm)
+
+
+def available_algorithms():
+    """Algoritmos aceitos em 'hash_algorithm' neste ambiente"""
+    names = set(hashlib.algorithms_available)
+    try:
+        new_hash('blake3')
+        names.add('blake3')
+    except ValueError:
+        pass
+    return sorted(names)
+
+
+class HashEngine:
+    """Lê arquivos para hash escolhendo a estratégia de E/S pelo tamanho
+
+    - até 'small_threshold': uma única leitura do arquivo inteiro (o custo
+      de alocar buffers e de cada volta em Python domina nos pequenos);
+    - até 'mmap_threshold': readinto em um único buffer de até
+      'buffer_size' bytes, com posix_fadvise SEQUENTIAL;
+    - acima disso, só com allow_mmap: mmap com madvise(MADV_SEQUENTIAL), e
+      o digest consome o mapeamento inteiro de uma vez, sem cópia e sem loop
+      em Python; sem allow_mmap segue com readinto.
+
+    mmap é opt-in porque os arquivos monitorados podem mudar durante o hash:
+    se um deles for truncado enquanto está mapeado, ler as páginas além do
+    novo fim gera SIGBUS e derruba o processo inteiro, não uma exceção.
+    Só habilite para árvores que não são truncadas no lugar.
+
+    engine diferente de 'auto' força uma estratégia para todos os tamanhos
+    ('mmap' explícito também é opt-in, com o mesmo risco); 'file_digest' usa
+    hashlib.file_digest (Python 3.11+).
+    """
+
+    def __init__(self, engine='auto', buffer_size=MB, small_threshold=MB,
+                 mmap_threshold=64 * MB, allow_mmap=False):
+        if engine not in ENGINES:
+            raise ValueError(f"Engine de hash inválido: {engine} (use {', '.join(ENGINES)})")
+        self.engine = engine
+        self.buffer_size = buffer_size
+        self.small_threshold = small_threshold
+        self.mmap_threshold = mmap_threshold
+        self.allow_mmap = allow_mmap
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o engine a partir de config['hash_engine'] (padrão: auto)"""
+        options = config.get('hash_engine') or {}
+        if isinstance(options, str):
+            options = {'engine': options}
+        return cls(
+            options.get('engine', 'auto'),
+            buffer_size=options.get('buffer_size', MB),
+            small_threshold=options.get('small_threshold', MB),
+            mmap_threshold=options.get('mmap_threshold', 64 * MB),
+            allow_mmap=options.get('allow_mmap', False)
+        )
+
+    def select(self, size, algorithms=1):
+        """Estratégia usada para um arquivo de size bytes"""
+        if self.engine != 'auto':
+            engine = self.engine
+        elif size <= self.small_threshold:
+            engine = 'read'
+        elif size < self.mmap_threshold or not self.allow_mmap:
+            engine = 'readinto'
+        else:
+            engine = 'mmap'
+        if engine == 'mmap' and size == 0:
+            return 'readinto'  # arquivos vazios não podem ser mapeados
+        if engine == 'file_digest' and (algorithms != 1 or not hasattr(hashlib, 'file_digest')):
+            return 'readinto'
+        return engine
+
+    def hash_file(self, file_path, algorithm, buffer_size=None):
+        """Hash hexadecimal do arquivo; erros de E/S são propagados"""
+        digest = new_hash(algorithm)
+        self.update_from_file(file_path, (digest,), buffer_size)
+        return digest.hexdigest()
+
+    def hash_file_multi(self, file_path, algorithms, buffer_size=None):
+        """{algoritmo: hash} lendo o arquivo uma única vez"""
+        digests = {algorithm: new_hash(algorithm) for algorithm in algorithms}
+        self.update_from_file(file_path, tuple(digests.values()), buffer_size)
+        return {algorithm: digest.hexdigest() for algorithm, digest in digests.items()}
+
+    def update_from_file(self, file_path, digests, buffer_size=None):
+        """Alimenta os objetos de digest com o conteúdo do arquivo; retorna os bytes lidos"""
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            size = os.fstat(fd).st_size
+            engine = self.select(size, len(digests))
+            if engine == 'read':
+                return self._update_read(fd, digests, size, buffer_size or self.buffer_size)
+            if engine == 'mmap':
+                return self._update_mmap(fd, digests)
+            with open(fd, 'rb', buffering=0, closefd=False) as f:
+                if engine == 'file_digest':
+                    hashlib.file_digest(f, lambda: digests[0])
+                    return size
+                # o buffer não passa do tamanho do arquivo (+1 para detectar o EOF)
+                buffer_size = min(buffer_size or self.buffer_size, size + 1)
+                return self._update_readinto(f, digests, buffer_size)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _update_read(fd, digests, size, buffer_size):
+        # uma chamada os.read direto no descritor, sem objeto de arquivo
+        data = os.read(fd, size + 1)
+        nbytes = len(data)
+        for digest in digests:
+            digest.update(data)
+        # leitura curta ou arquivo crescendo desde o fstat: segue até o EOF
+        while nbytes != size:
+            data = os.read(fd, buffer_size)
+            if not data:
+                break
+            nbytes += len(data)
+            for digest in digests:
+                digest.update(data)
+        return nbytes
+
+    @staticmethod
+    def _update_mmap(fd, digests):
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            for digest in digests:
+                digest.update(mapped)
+            return len(mapped)
+
+    @staticmethod
+    def _update_readinto(f, digests, buffer_size):
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        buffer = bytearray(buffer_size)
+        view = memoryview(buffer)
+        updates = [digest.update for digest in digests]
+        nbytes = 0
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                return nbytes
+            nbytes += n
+            block = view[:n]
+            for update in updates:
+                update(block)
+
+
+# Engine padrão (auto) usado quando nenhum é configurado
+default_engine = HashEngine()
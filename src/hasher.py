@@ -1,24 +1,42 @@
 import hashlib
 import os
+import time
 import logging
 from datetime import datetime
-from Crypto.PublicKey import RSA
-from Crypto.Signature import pkcs1_15
-from Crypto.Hash import SHA256
-from Crypto import Random
 import json
 import base64
 
+try:
+    from .merkle import MerkleIndex
+    from .sampling import sample_fingerprint
+    from .metrics import metrics
+    from .hash_engine import new_hash, default_engine
+except ImportError:
+    from merkle import MerkleIndex
+    from sampling import sample_fingerprint
+    from metrics import metrics
+    from hash_engine import new_hash, default_engine
+
+DEFAULT_ALGORITHMS = ['md5', 'sha1', 'sha256', 'sha512']
+
 class AdvancedHasher:
-    def __init__(self, algorithm='sha256', private_key_path=None, public_key_path=None):
+    """Hashing multi-algoritmo e assinatura RSA de baselines
+
+    O pycryptodome só é importado quando uma chave é gerada, carregada ou
+    usada, e o par de chaves ausente só é gerado na primeira assinatura.
+    """
+
+    def __init__(self, algorithm='sha256', private_key_path=None, public_key_path=None,
+                 algorithms=None, hash_cache=None, engine=None):
         self.algorithm = algorithm.lower()
+        self.algorithms = [a.lower() for a in (algorithms or DEFAULT_ALGORITHMS)]
         self.private_key_path = private_key_path
         self.public_key_path = public_key_path
+        self.hash_cache = hash_cache
+        self.engine = engine or default_engine
+        self._key_cache = {}
         self.setup_logging()
     
-        if private_key_path and not os.path.exists(private_key_path):
-            self.generate_keys(private_key_path, public_key_path)
-    
     def setup_logging(self):
         logging.basicConfig(
             filename='hasher.log',
@@ -26,8 +44,16 @@ class AdvancedHasher:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
     
+    def ensure_keys(self):
+        """Gera o par de chaves configurado se a chave privada ainda não existir"""
+        if self.private_key_path and not os.path.exists(self.private_key_path):
+            self.generate_keys(self.private_key_path, self.public_key_path)
+    
     def generate_keys(self, private_key_path, public_key_path):
         """Gera par de chaves RSA para assinatura digital"""
+        from Crypto.PublicKey import RSA
+        from Crypto import Random
+        
         try:
             random_generator = Random.new().read
             key = RSA.generate(2048, random_generator)
@@ -45,42 +71,106 @@ class AdvancedHasher:
             logging.error(f"Erro ao gerar chaves RSA: {e}")
             raise
     
-    def calculate_hash(self, file_path, block_size=65536):
-        """Calcula hash do arquivo com algoritmo configurado"""
+    def calculate_hash(self, file_path, block_size=None):
+        """Calcula hash do arquivo com algoritmo configurado
+
+        A leitura é feita pelo HashEngine (block_size substitui o tamanho do
+        buffer de readinto). Com hash_cache (ver HashCache), um inode já lido
+        e não alterado não é relido, mesmo que apareça sob outro caminho.
+        """
         if not os.path.exists(file_path):
             logging.error(f"Arquivo não encontrado: {file_path}")
             return None
         
+        if self.hash_cache is not None:
+            return self.hash_cache.get_or_compute(
+                file_path, self.algorithm, lambda path: self._read_hash(path, block_size)
+            )
+        return self._read_hash(file_path, block_size)
+    
+    def _read_hash(self, file_path, block_size):
         try:
-            hash_func = getattr(hashlib, self.algorithm)()
-            
-            with open(file_path, 'rb') as f:
-                for block in iter(lambda: f.read(block_size), b""):
-                    hash_func.update(block)
+            hash_func = new_hash(self.algorithm)
+            start = time.perf_counter()
+            nbytes = self.engine.update_from_file(file_path, (hash_func,), block_size)
             
+            if metrics.enabled:
+                metrics.record_hash(self.algorithm, nbytes, time.perf_counter() - start)
             return hash_func.hexdigest()
         except Exception as e:
             logging.error(f"Erro ao calcular hash de {file_path}: {e}")
             return None
     
-    def calculate_multiple_hashes(self, file_path):
-        """Calcula múltiplos hashes para o mesmo arquivo"""
-        hashes = {}
-        algorithms = ['md5', 'sha1', 'sha256', 'sha512']
+    def calculate_fingerprint(self, file_path, samples=16, block_size=65536):
+        """Fingerprint amostrado (tamanho + início + fim + blocos espaçados)"""
+        return sample_fingerprint(file_path, self.algorithm, samples, block_size)
+    
+    def calculate_multiple_hashes(self, file_path, algorithms=None, block_size=None):
+        """Calcula múltiplos hashes lendo o arquivo uma única vez
+
+        O HashEngine repassa cada bloco lido (ou o mmap inteiro) a todos os
+        objetos de digest.
+        """
+        algorithms = [a.lower() for a in (algorithms or self.algorithms)]
+        hashes = {algo: None for algo in algorithms}
+        hash_funcs = {}
+        
+        stat_info = None
+        if self.hash_cache is not None:
+            try:
+                stat_info = os.stat(file_path)
+            except OSError:
+                pass
+            if stat_info is not None and stat_info.st_ino:
+                cached = {algo: self.hash_cache.get(stat_info, algo) for algo in algorithms}
+                if all(cached.values()):
+                    return cached
+            else:
+                stat_info = None
         
         for algo in algorithms:
             try:
-                hash_func = getattr(hashlib, algo)()
-                with open(file_path, 'rb') as f:
-                    for block in iter(lambda: f.read(65536), b""):
-                        hash_func.update(block)
+                hash_funcs[algo] = new_hash(algo)
+            except ValueError as e:
+                logging.error(f"Algoritmo de hash inválido {algo}: {e}")
+        
+        try:
+            start = time.perf_counter()
+            nbytes = self.engine.update_from_file(file_path, tuple(hash_funcs.values()),
+                                                  block_size)
+            
+            if metrics.enabled:
+                metrics.record_hash('+'.join(hash_funcs), nbytes, time.perf_counter() - start)
+            
+            for algo, hash_func in hash_funcs.items():
                 hashes[algo] = hash_func.hexdigest()
-            except Exception as e:
-                logging.error(f"Erro ao calcular {algo} para {file_path}: {e}")
-                hashes[algo] = None
+            if stat_info is not None:
+                self.hash_cache.put_if_unchanged(file_path, stat_info, hashes)
+        except Exception as e:
+            logging.error(f"Erro ao calcular hashes para {file_path}: {e}")
+            hashes = {algo: None for algo in algorithms}
         
         return hashes
     
+    def load_key(self, key_path):
+        """Carrega uma chave RSA do disco uma única vez e a mantém em cache"""
+        key = self._key_cache.get(key_path)
+        if key is None:
+            from Crypto.PublicKey import RSA
+            with open(key_path, 'rb') as key_file:
+                key = RSA.import_key(key_file.read())
+            self._key_cache[key_path] = key
+        return key
+    
+    @staticmethod
+    def canonical_bytes(data):
+        """Serialização canônica usada para assinar e verificar"""
+        if isinstance(data, dict):
+            data_str = json.dumps(data, sort_keys=True)
+        else:
+            data_str = str(data)
+        return data_str.encode()
+    
     def sign_data(self, data, private_key_path=None):
         """Assina digitalmente os dados"""
         key_path = private_key_path or self.private_key_path
@@ -89,16 +179,13 @@ class AdvancedHasher:
             return None
         
         try:
-            with open(key_path, 'rb') as key_file:
-                private_key = RSA.import_key(key_file.read())
-            
-          
-            if isinstance(data, dict):
-                data_str = json.dumps(data, sort_keys=True)
-            else:
-                data_str = str(data)
+            from Crypto.Signature import pkcs1_15
+            from Crypto.Hash import SHA256
             
-            hash_obj = SHA256.new(data_str.encode())
+            if key_path == self.private_key_path:
+                self.ensure_keys()
+            private_key = self.load_key(key_path)
+            hash_obj = SHA256.new(self.canonical_bytes(data))
             signature = pkcs1_15.new(private_key).sign(hash_obj)
             return base64.b64encode(signature).decode()
         except Exception as e:
@@ -113,15 +200,11 @@ class AdvancedHasher:
             return False
         
         try:
-            with open(key_path, 'rb') as key_file:
-                public_key = RSA.import_key(key_file.read())
+            from Crypto.Signature import pkcs1_15
+            from Crypto.Hash import SHA256
             
-            if isinstance(data, dict):
-                data_str = json.dumps(data, sort_keys=True)
-            else:
-                data_str = str(data)
-            
-            hash_obj = SHA256.new(data_str.encode())
+            public_key = self.load_key(key_path)
+            hash_obj = SHA256.new(self.canonical_bytes(data))
             signature_bytes = base64.b64decode(signature)
             pkcs1_15.new(public_key).verify(hash_obj, signature_bytes)
             return True
@@ -132,6 +215,45 @@ class AdvancedHasher:
             logging.error(f"Erro ao verificar assinatura: {e}")
             return False
     
+    def verify_signatures(self, items, public_key_path=None):
+        """Verifica em lote uma sequência de (dados, assinatura)"""
+        return [self.verify_signature(data, signature, public_key_path)
+                for data, signature in items]
+    
+    def manifest_root(self, files_baseline):
+        """Raiz Merkle sobre os registros completos (sem assinatura) da baseline"""
+        index = MerkleIndex()
+        for file_path, record in files_baseline.items():
+            unsigned = {k: v for k, v in record.items() if k != 'signature'}
+            index.update(file_path, hashlib.sha256(self.canonical_bytes(unsigned)).hexdigest())
+        return index.root_hash
+    
+    def sign_manifest(self, files_baseline, private_key_path=None):
+        """Assina um único manifesto canônico para toda a baseline
+
+        Em vez de uma assinatura RSA por arquivo, assina a raiz Merkle dos
+        registros, o número de arquivos e o algoritmo.
+        """
+        manifest = {
+            'merkle_root': self.manifest_root(files_baseline),
+            'file_count': len(files_baseline),
+            'algorithm': self.algorithm,
+            'timestamp': datetime.now().isoformat()
+        }
+        manifest['signature'] = self.sign_data(manifest, private_key_path)
+        return manifest
+    
+    def verify_manifest(self, files_baseline, manifest, public_key_path=None):
+        """Verifica a assinatura do manifesto e se ele corresponde à baseline"""
+        signature = manifest.get('signature')
+        if not signature:
+            return False
+        unsigned = {k: v for k, v in manifest.items() if k != 'signature'}
+        if not self.verify_signature(unsigned, signature, public_key_path):
+            return False
+        return (manifest.get('file_count') == len(files_baseline) and
+                manifest.get('merkle_root') == self.manifest_root(files_baseline))
+    
     def get_file_metadata(self, file_path):
         """Obtém metadados do arquivo"""
         if not os.path.exists(file_path):
@@ -151,8 +273,12 @@ class AdvancedHasher:
             logging.error(f"Erro ao obter metadados de {file_path}: {e}")
             return None
     
-    def create_file_baseline(self, file_path, include_signature=True):
-        """Cria baseline completa para um arquivo"""
+    def create_file_baseline(self, file_path, include_signature=False):
+        """Cria baseline completa para um arquivo
+
+        A assinatura por arquivo é opcional; para baselines grandes prefira
+        sign_manifest(), que assina todos os registros de uma vez.
+        """
         if not os.path.exists(file_path):
             return None
         
@@ -169,8 +295,12 @@ class AdvancedHasher:
         
         return baseline
 
-def verify_files_against_baseline(files_baseline, hasher_instance):
-    """Verifica vários arquivos contra uma baseline"""
+def verify_files_against_baseline(files_baseline, hasher_instance, manifest=None):
+    """Verifica vários arquivos contra uma baseline
+
+    Se um manifesto assinado for informado, ele é verificado uma única vez
+    para toda a baseline.
+    """
     results = {
         'unchanged': [],
         'modified': [],
@@ -179,6 +309,9 @@ def verify_files_against_baseline(files_baseline, hasher_instance):
         'errors': []
     }
     
+    if manifest is not None and not hasher_instance.verify_manifest(files_baseline, manifest):
+        results['errors'].append("Assinatura do manifesto inválida")
+    
     for file_path, baseline_data in files_baseline.items():
         if not os.path.exists(file_path):
             results['deleted'].append(file_path)
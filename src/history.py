@@ -0,0 +1,299 @@
+import os
+import json
+import zlib
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+try:
+    from .merkle import diff_baselines
+except ImportError:
+    from merkle import diff_baselines
+
+
+def _pack(entry):
+    return [entry['hash'], entry.get('size'), entry.get('mtime_ns')]
+
+
+def _unpack(packed):
+    file_hash, size, mtime_ns = packed
+    return {'hash': file_hash, 'size': size, 'mtime_ns': mtime_ns}
+
+
+def _timestamp(when):
+    if when is None:
+        return None
+    return when.isoformat() if isinstance(when, datetime) else str(when)
+
+
+class BaselineHistory:
+    """Histórico versionado do estado observado dos arquivos
+
+    Cada snapshot guarda só as entradas novas, alteradas e removidas em
+    relação ao anterior (JSON comprimido com zlib). Um checkpoint completo é
+    gravado quando as alterações acumuladas desde o último passam de
+    'checkpoint_ratio' vezes o total de arquivos ou a cadeia de deltas chega
+    a 'max_chain', então o espaço cresce com a taxa de alteração e a
+    reconstrução lê no máximo um checkpoint mais max_chain deltas.
+
+    A tabela file_history indexa (caminho, snapshot) de cada alteração para
+    consultas por arquivo sem reconstruir snapshots.
+    """
+
+    def __init__(self, db_path='data/history.db', checkpoint_ratio=0.5, max_chain=500,
+                 compression_level=6):
+        self.db_path = db_path
+        self.checkpoint_ratio = checkpoint_ratio
+        self.max_chain = max_chain
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                source TEXT,
+                kind TEXT NOT NULL,
+                checkpoint_id INTEGER,
+                file_count INTEGER,
+                changed INTEGER,
+                data BLOB NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_history (
+                path TEXT NOT NULL,
+                snapshot_id INTEGER NOT NULL,
+                hash TEXT,
+                size INTEGER,
+                mtime_ns INTEGER,
+                PRIMARY KEY (path, snapshot_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots (timestamp)"
+        )
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o histórico a partir de config['baseline_history'] (None se ausente)"""
+        options = config.get('baseline_history') or {}
+        if not options.get('enabled'):
+            return None
+        return cls(
+            options.get('path', 'data/history.db'),
+            checkpoint_ratio=options.get('checkpoint_ratio', 0.5),
+            max_chain=options.get('max_chain', 500)
+        )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _compress(self, data):
+        return zlib.compress(json.dumps(data, separators=(',', ':')).encode(),
+                             self.compression_level)
+
+    @staticmethod
+    def _decompress(blob):
+        return json.loads(zlib.decompress(blob))
+
+    def _latest(self):
+        return self.conn.execute(
+            "SELECT id, checkpoint_id, file_count FROM snapshots ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+
+    def _chain_stats(self, checkpoint_id):
+        return self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(changed), 0) FROM snapshots "
+            "WHERE checkpoint_id = ? AND kind = 'delta'", (checkpoint_id,)
+        ).fetchone()
+
+    def _state(self, snapshot_id):
+        """Estado compactado {caminho: [hash, tamanho, mtime_ns]} em um snapshot"""
+        row = self.conn.execute(
+            "SELECT checkpoint_id FROM snapshots WHERE id = ?", (snapshot_id,)
+        ).fetchone()
+        if row is None:
+            return {}
+        cursor = self.conn.execute(
+            "SELECT kind, data FROM snapshots WHERE id >= ? AND id <= ? "
+            "AND (id = ? OR checkpoint_id = ?) ORDER BY id",
+            (row[0], snapshot_id, row[0], row[0])
+        )
+        state = {}
+        for kind, blob in cursor:
+            data = self._decompress(blob)
+            if kind == 'full':
+                state = data['entries']
+                continue
+            state.update(data['changed'])
+            for path in data['deleted']:
+                state.pop(path, None)
+        return state
+
+    def record(self, changed, deleted=(), source='scan', timestamp=None):
+        """Grava um snapshot com as entradas alteradas e os caminhos removidos
+
+        changed mapeia caminho -> entrada ({'hash', 'size', 'mtime_ns'});
+        entradas iguais à versão vigente são descartadas. Retorna o id do
+        snapshot, ou None se não houver alteração.
+        """
+        changed = {path: _pack(entry) for path, entry in changed.items()}
+        deleted = set(deleted) - set(changed)
+        timestamp = _timestamp(timestamp) or datetime.now().isoformat()
+
+        with self._lock, self.conn:
+            latest = self._latest()
+            if latest is None:
+                deleted = []
+            else:
+                changed = {path: packed for path, packed in changed.items()
+                           if self._version(path, latest[0]) != packed}
+                # remoções de caminhos que já não existiam não são alterações
+                deleted = sorted(path for path in deleted if not self._is_new(path, latest[0]))
+            if not changed and not deleted:
+                return None
+
+            if latest is None:
+                checkpoint = True
+            else:
+                chain_length, chain_changes = self._chain_stats(latest[1])
+                file_count = latest[2] or 0
+                chain_changes += len(changed) + len(deleted)
+                checkpoint = (chain_length + 1 >= self.max_chain or
+                              chain_changes > self.checkpoint_ratio * max(file_count, 1))
+
+            if checkpoint:
+                state = self._state(latest[0]) if latest else {}
+                state.update(changed)
+                for path in deleted:
+                    state.pop(path, None)
+                kind, data, file_count = 'full', {'entries': state}, len(state)
+            else:
+                kind = 'delta'
+                data = {'changed': changed, 'deleted': deleted}
+                file_count = latest[2] + sum(1 for path in changed
+                                             if self._is_new(path, latest[0]))
+                file_count -= len(deleted)
+
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (timestamp, source, kind, checkpoint_id, file_count, "
+                "changed, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, source, kind, None if checkpoint else latest[1], file_count,
+                 len(changed) + len(deleted), self._compress(data))
+            )
+            snapshot_id = cursor.lastrowid
+            if checkpoint:
+                self.conn.execute("UPDATE snapshots SET checkpoint_id = id WHERE id = ?",
+                                  (snapshot_id,))
+
+            rows = [(path, snapshot_id, *packed) for path, packed in changed.items()]
+            rows.extend((path, snapshot_id, None, None, None) for path in deleted)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO file_history VALUES (?, ?, ?, ?, ?)", rows
+            )
+        logging.info(f"Snapshot {snapshot_id} ({kind}, {source}): "
+                     f"{len(changed)} alterados, {len(deleted)} removidos")
+        return snapshot_id
+
+    def _version(self, path, snapshot_id):
+        """Entrada empacotada vigente no snapshot informado (None se não existia)"""
+        row = self.conn.execute(
+            "SELECT hash, size, mtime_ns FROM file_history WHERE path = ? AND snapshot_id <= ? "
+            "ORDER BY snapshot_id DESC LIMIT 1", (path, snapshot_id)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return list(row)
+
+    def _is_new(self, path, snapshot_id):
+        """Se o caminho não existia no snapshot informado"""
+        return self._version(path, snapshot_id) is None
+
+    def record_full(self, baseline, source='baseline', timestamp=None):
+        """Grava o estado completo informado como delta contra o último snapshot"""
+        with self._lock:
+            latest = self._latest()
+            previous = self._state(latest[0]) if latest else {}
+        changed = {}
+        for path, entry in baseline.items():
+            if previous.pop(path, None) != _pack(entry):
+                changed[path] = entry
+        return self.record(changed, previous.keys(), source, timestamp)
+
+    def snapshot_at(self, when=None):
+        """Id do último snapshot gravado até o instante informado (None = mais recente)"""
+        with self._lock:
+            if when is None:
+                row = self._latest()
+            else:
+                row = self.conn.execute(
+                    "SELECT id FROM snapshots WHERE timestamp <= ? ORDER BY id DESC LIMIT 1",
+                    (_timestamp(when),)
+                ).fetchone()
+        return row[0] if row else None
+
+    def reconstruct(self, when=None):
+        """Estado {caminho: entrada} em um instante (datetime ou ISO 8601)"""
+        snapshot_id = self.snapshot_at(when)
+        if snapshot_id is None:
+            return {}
+        with self._lock:
+            state = self._state(snapshot_id)
+        return {path: _unpack(packed) for path, packed in state.items()}
+
+    def changes_between(self, start, end=None):
+        """Caminhos novos, modificados e removidos entre dois instantes"""
+        return diff_baselines(self.reconstruct(start), self.reconstruct(end))
+
+    def file_history(self, path, limit=None):
+        """Versões de um arquivo, da mais recente para a mais antiga
+
+        Uma versão com hash None indica que o arquivo foi removido.
+        """
+        sql = ("SELECT h.snapshot_id, s.timestamp, s.source, h.hash, h.size, h.mtime_ns "
+               "FROM file_history h JOIN snapshots s ON s.id = h.snapshot_id "
+               "WHERE h.path = ? ORDER BY h.snapshot_id DESC")
+        params = [path]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(zip(('snapshot', 'timestamp', 'source', 'hash', 'size', 'mtime_ns'), row))
+                for row in rows]
+
+    def entry_at(self, path, when):
+        """Entrada de um arquivo em um instante, ou None se não existia"""
+        snapshot_id = self.snapshot_at(when)
+        if snapshot_id is None:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT hash, size, mtime_ns FROM file_history WHERE path = ? "
+                "AND snapshot_id <= ? ORDER BY snapshot_id DESC LIMIT 1", (path, snapshot_id)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return _unpack(row)
+
+    def snapshots(self, limit=100):
+        """Metadados dos snapshots mais recentes"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, timestamp, source, kind, checkpoint_id, file_count, changed, "
+                "LENGTH(data) FROM snapshots ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        fields = ('id', 'timestamp', 'source', 'kind', 'checkpoint_id', 'file_count',
+                  'changed', 'stored_bytes')
+        return [dict(zip(fields, row)) for row in rows]
@@ -0,0 +1,184 @@
+import hashlib
+
+
+def entry_digest(entry, algorithm='sha256'):
+    """Extrai o hash de uma entrada de baseline (monitor ou AdvancedHasher)"""
+    if 'hash' in entry:
+        return entry['hash']
+    return (entry.get('hashes') or {}).get(algorithm)
+
+
+class MerkleNode:
+    """Diretório da árvore: filhos são MerkleNode (subdiretórios) ou hashes"""
+    __slots__ = ('children', '_digest')
+
+    def __init__(self):
+        self.children = {}
+        self._digest = None
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            h = hashlib.sha256()
+            for name in sorted(self.children):
+                child = self.children[name]
+                if isinstance(child, MerkleNode):
+                    h.update(b'D' + name.encode('utf-8', 'surrogateescape') + b'\0')
+                    h.update(child.digest.encode())
+                else:
+                    h.update(b'F' + name.encode('utf-8', 'surrogateescape') + b'\0')
+                    h.update(str(child).encode())
+                h.update(b'\n')
+            self._digest = h.hexdigest()
+        return self._digest
+
+
+class MerkleIndex:
+    """Índice Merkle hierárquico sobre uma baseline
+
+    Cada diretório guarda um digest dos seus filhos, então duas baselines
+    (ou dois hosts) podem ser comparadas descendo apenas pelas subárvores
+    cujo digest difere, e a árvore inteira é resumida em root_hash.
+    """
+
+    def __init__(self):
+        self.root = MerkleNode()
+        self.absolute = None
+
+    @classmethod
+    def from_baseline(cls, baseline, algorithm='sha256'):
+        index = cls()
+        for path, entry in baseline.items():
+            digest = entry_digest(entry, algorithm)
+            if digest is not None:
+                index.update(path, digest)
+        return index
+
+    @staticmethod
+    def _parts(path):
+        return [part for part in str(path).split('/') if part]
+
+    def _node(self, parts, create=False):
+        node = self.root
+        for part in parts:
+            child = node.children.get(part)
+            if not isinstance(child, MerkleNode):
+                if not create:
+                    return None
+                child = node.children[part] = MerkleNode()
+            node = child
+        return node
+
+    def _invalidate(self, parts):
+        node = self.root
+        node._digest = None
+        for part in parts:
+            node = node.children.get(part)
+            if not isinstance(node, MerkleNode):
+                return
+            node._digest = None
+
+    def update(self, path, digest):
+        """Insere ou atualiza o hash de um arquivo, invalidando os ancestrais"""
+        if self.absolute is None:
+            self.absolute = str(path).startswith('/')
+        parts = self._parts(path)
+        parent = self._node(parts[:-1], create=True)
+        parent.children[parts[-1]] = digest
+        self._invalidate(parts[:-1])
+
+    def remove(self, path):
+        """Remove o arquivo e os diretórios que ficarem vazios
+
+        Assim o root_hash volta a ser o mesmo de um índice construído do zero.
+        """
+        parts = self._parts(path)
+        chain = [self.root]
+        for part in parts[:-1]:
+            child = chain[-1].children.get(part)
+            if not isinstance(child, MerkleNode):
+                return
+            chain.append(child)
+        if chain[-1].children.pop(parts[-1], None) is None:
+            return
+        for depth in range(len(chain) - 1, 0, -1):
+            if chain[depth].children:
+                break
+            del chain[depth - 1].children[parts[depth - 1]]
+        self._invalidate(parts[:-1])
+        if not self.root.children:
+            self.absolute = None
+
+    @property
+    def root_hash(self):
+        return self.root.digest
+
+    def digest_of(self, directory):
+        """Digest de um diretório (ou None se não existir no índice)"""
+        node = self._node(self._parts(directory))
+        return node.digest if node is not None else None
+
+    def children(self, directory=''):
+        """Digests dos filhos imediatos de um diretório, para comparação remota"""
+        node = self._node(self._parts(directory))
+        if node is None:
+            return {}
+        return {
+            name: child.digest if isinstance(child, MerkleNode) else child
+            for name, child in node.children.items()
+        }
+
+    def diff(self, other):
+        """Compara com outro índice visitando só as subárvores alteradas
+
+        Retorna {'modified': [...], 'new': [...], 'deleted': [...]} com os
+        caminhos de arquivos, sendo 'new' o que existe apenas em other.
+        """
+        results = {'modified': [], 'new': [], 'deleted': []}
+        # um índice vazio não sabe se os caminhos são absolutos: vale o outro lado
+        absolute = self.absolute if self.absolute is not None else other.absolute
+        self._diff_nodes(self.root, other.root, '', results, bool(absolute))
+        return results
+
+    @staticmethod
+    def _join(path, name, absolute):
+        return f"{path}/{name}" if path or absolute else name
+
+    def _diff_nodes(self, mine, theirs, path, results, absolute):
+        if mine.digest == theirs.digest:
+            return
+        for name in mine.children.keys() | theirs.children.keys():
+            child_path = self._join(path, name, absolute)
+            a = mine.children.get(name)
+            b = theirs.children.get(name)
+            if isinstance(a, MerkleNode) and isinstance(b, MerkleNode):
+                self._diff_nodes(a, b, child_path, results, absolute)
+                continue
+            if a is not None and a == b:
+                continue
+            if isinstance(a, MerkleNode) or isinstance(b, MerkleNode):
+                # diretório de um lado, arquivo do outro
+                self._collect(a, child_path, results['deleted'], absolute)
+                self._collect(b, child_path, results['new'], absolute)
+            elif a is None:
+                results['new'].append(child_path)
+            elif b is None:
+                results['deleted'].append(child_path)
+            else:
+                results['modified'].append(child_path)
+
+    def _collect(self, node, path, out, absolute):
+        if node is None:
+            return
+        if not isinstance(node, MerkleNode):
+            out.append(path)
+            return
+        for name, child in node.children.items():
+            self._collect(child, self._join(path, name, absolute), out, absolute)
+
+
+def diff_baselines(old_baseline, new_baseline, algorithm='sha256'):
+    """Compara duas baselines através dos seus índices Merkle"""
+    old_index = MerkleIndex.from_baseline(old_baseline, algorithm)
+    new_index = MerkleIndex.from_baseline(new_baseline, algorithm)
+    return old_index.diff(new_index)
@@ -0,0 +1,176 @@
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    def __init__(self, registry, name, help_text, kind):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self._lock = registry._lock
+        self._values = {}
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    def __init__(self, registry, name, help_text):
+        super().__init__(registry, name, help_text, 'counter')
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Gauge com valor definido por set() ou lido de um callback no render
+
+    O callback retorna pares (labels, valor), ex.: [({'channel': 'email'}, 3)].
+    """
+
+    def __init__(self, registry, name, help_text):
+        super().__init__(registry, name, help_text, 'gauge')
+        self.callback = None
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def samples(self):
+        if self.callback is None:
+            return super().samples()
+        try:
+            values = self.callback()
+        except Exception:
+            return []
+        return [(self.name, _key(labels), value) for labels, value in values]
+
+
+class Histogram(Metric):
+    def __init__(self, registry, name, help_text, buckets=DURATION_BUCKETS):
+        super().__init__(registry, name, help_text, 'histogram')
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                data[0][index] += 1
+            data[1] += 1
+            data[2] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), count, total)
+                      for key, (counts, count, total) in self._values.items()]
+        samples = []
+        for key, counts, count, total in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', key + (('le', _format_value(bound)),),
+                                cumulative))
+            samples.append((self.name + '_bucket', key + (('le', '+Inf'),), count))
+            samples.append((self.name + '_count', key, count))
+            samples.append((self.name + '_sum', key, total))
+        return samples
+
+
+class MetricsRegistry:
+    """Métricas em formato texto do Prometheus
+
+    Com enabled=False os pontos instrumentados só testam a flag, então o
+    custo no caminho quente é desprezível.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(self, name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge(self, name, help_text))
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS):
+        return self._register(Histogram(self, name, help_text, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            samples = metric.samples()
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MonitorMetrics(MetricsRegistry):
+    """Métricas do monitor, do hasher e do despacho de alertas"""
+
+    def __init__(self, enabled=False):
+        super().__init__(enabled)
+        self.cycle_seconds = self.histogram(
+            'pywatchdog_cycle_duration_seconds', 'Duração de cada ciclo de verificação')
+        self.files_stat = self.counter(
+            'pywatchdog_files_stat_total', 'Arquivos verificados via os.stat')
+        self.files_hashed = self.counter(
+            'pywatchdog_files_hashed_total', 'Arquivos lidos para cálculo de hash')
+        self.bytes_read = self.counter(
+            'pywatchdog_bytes_read_total', 'Bytes lidos para cálculo de hash')
+        self.hash_seconds = self.counter(
+            'pywatchdog_hash_seconds_total', 'Tempo gasto calculando hashes')
+        self.hash_cache_requests = self.counter(
+            'pywatchdog_hash_cache_requests_total', 'Consultas ao cache de hashes por inode')
+        self.files_total = self.gauge(
+            'pywatchdog_files', 'Arquivos na baseline')
+        self.alert_queue_depth = self.gauge(
+            'pywatchdog_alert_queue_depth', 'Alertas aguardando envio por canal')
+        self.alert_send_seconds = self.histogram(
+            'pywatchdog_alert_send_duration_seconds', 'Latência de envio por canal')
+
+    def record_hash(self, algorithm, nbytes, seconds, kind='full'):
+        """Registra a leitura de um arquivo para hash (kind: full ou sample)"""
+        self.files_hashed.inc(algorithm=algorithm, kind=kind)
+        self.bytes_read.inc(nbytes, algorithm=algorithm, kind=kind)
+        self.hash_seconds.inc(seconds, algorithm=algorithm, kind=kind)
+
+
+# Instância compartilhada entre monitor, hasher, alertas e a rota /metrics
+metrics = MonitorMetrics()
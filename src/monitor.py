@@ -1,16 +1,152 @@
 import os
 import time
 import yaml
-import hashlib
 import logging
-from pathlib import Path
+import threading
+from collections import deque
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    from .scanner import FileScanner
+    from .events import EventQueue, start_observer
+    from .baseline_store import BaselineStore
+    from .compact import CompactBaseline, CompactStatCache
+    from .sampling import SamplingPolicy
+    from .suppression import AlertIndex
+    from .pubsub import event_bus, monitor_stats
+    from .file_index import FileIndex
+    from .scheduler import ScanScheduler, IOThrottle
+    from .metrics import metrics
+    from .hash_cache import HashCache
+    from .history import BaselineHistory
+    from .hash_engine import HashEngine, default_engine
+except ImportError:
+    from scanner import FileScanner
+    from events import EventQueue, start_observer
+    from baseline_store import BaselineStore
+    from compact import CompactBaseline, CompactStatCache
+    from sampling import SamplingPolicy
+    from suppression import AlertIndex
+    from pubsub import event_bus, monitor_stats
+    from file_index import FileIndex
+    from scheduler import ScanScheduler, IOThrottle
+    from metrics import metrics
+    from hash_cache import HashCache
+    from history import BaselineHistory
+    from hash_engine import HashEngine, default_engine
+
+
+def hash_file(file_path, algorithm, engine=None):
+    """Calcula hash do arquivo com o algoritmo informado
+
+    A leitura fica a cargo do HashEngine (padrão: estratégia por tamanho).
+    """
+    try:
+        return (engine or default_engine).hash_file(file_path, algorithm)
+    except Exception as e:
+        logging.error(f"Erro ao calcular hash de {file_path}: {e}")
+        return None
+
+
+def file_signature(stat_info):
+    """Assinatura barata do arquivo a partir de um único os.stat"""
+    return (stat_info.st_size, stat_info.st_mtime_ns,
+            stat_info.st_ino, stat_info.st_ctime_ns)
+
+
+def build_baseline_entry(file_path, algorithm, stat_info=None, sampling=None, hash_cache=None,
+                         engine=None, on_read=None):
+    """Gera a entrada de baseline de um arquivo (usável em thread ou processo)
+
+    Reaproveita stat_info quando já obtido pelo scanner. Se a SamplingPolicy
+    classificar o arquivo como 'sample', a entrada também guarda o
+    fingerprint amostrado. Com hash_cache, hardlinks do mesmo inode são lidos
+    uma única vez. on_read, se informado, recebe o tamanho de cada arquivo
+    efetivamente lido (acertos do cache não contam). Retorna (caminho,
+    entrada, assinatura) ou None.
+    """
+    if stat_info is None:
+        try:
+            stat_info = os.stat(file_path)
+        except OSError as e:
+            logging.error(f"Erro ao obter stat de {file_path}: {e}")
+            return None
+    
+    def compute(path):
+        digest = hash_file(path, algorithm, engine)
+        if on_read is not None:
+            on_read(stat_info.st_size)
+        return digest
+    
+    if hash_cache is not None:
+        file_hash = hash_cache.get_or_compute(file_path, algorithm, compute, stat_info)
+    else:
+        file_hash = compute(file_path)
+    if not file_hash:
+        return None
+    
+    entry = {
+        'hash': file_hash,
+        'last_modified': stat_info.st_mtime,
+        'mtime_ns': stat_info.st_mtime_ns,
+        'size': stat_info.st_size
+    }
+    if sampling and sampling.tier_for(file_path, stat_info.st_size) == 'sample':
+        entry['tier'] = 'sample'
+        entry['fingerprint'] = sampling.fingerprint(file_path, algorithm, stat_info.st_size)
+    return file_path, entry, file_signature(stat_info)
+
 
 class FileIntegrityMonitor:
+    CHANGE_MESSAGES = {
+        'deleted': "ARQUIVO REMOVIDO",
+        'modified': "ARQUIVO MODIFICADO",
+        'metadata': "METADADO ALTERADO",
+        'size': "TAMANHO ALTERADO"
+    }
+    
     def __init__(self, config_path="config/config.yaml"):
         self.load_config(config_path)
-        self.baseline = {}
+        # protege baseline/stat_cache/file_status das leituras de outras threads
+        self.state_lock = threading.RLock()
+        self.baseline = self.new_baseline()
+        self.stat_cache = self.new_stat_cache()
+        self.dirty_paths = set()
+        self.file_status = {}
+        self.file_index = FileIndex()
+        self.alert_history = deque(maxlen=self.config.get('alert_history_size', 1000))
+        self.pending_alerts = []
+        self.cycle_count = 0
+        self.events = event_bus
+        self.stats = monitor_stats
+        self.metrics = metrics
         self.setup_logging()
+        if self.config.get('metrics_enabled'):
+            self.metrics.enabled = True
+            self.metrics.files_total.callback = lambda: [({}, len(self.baseline))]
+        
+        self.sampling = SamplingPolicy.from_config(self.config)
+        self.alert_index = AlertIndex.from_config(self.config)
+        self.scheduler = ScanScheduler.from_config(self.config)
+        self.throttle = IOThrottle.from_config(self.config)
+        self.hash_cache = HashCache.from_config(self.config)
+        self.hash_engine = HashEngine.from_config(self.config)
+        self.coordinator = None
+        self.event_queue = None
+        self.observer = None
+        self.last_poll = None
+        self.store = None
+        if self.config.get('baseline_db'):
+            self.store = BaselineStore(self.config['baseline_db'])
+        self.history = BaselineHistory.from_config(self.config)
+        
+        self.alert_system = None
+        # só com algum canal habilitado: um bloco todo desligado não carrega
+        # requests/smtplib nem cria a thread do dispatcher
+        methods = self.config.get('alert_methods') or {}
+        if any(isinstance(method, dict) and method.get('enabled') for method in methods.values()):
+            self.setup_alerts()
         
     def load_config(self, config_path):
         with open(config_path, 'r') as f:
@@ -23,73 +159,607 @@ class FileIntegrityMonitor:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
     
+    def new_baseline(self):
+        """Cria o contêiner da baseline (compacto se 'compact_baseline')"""
+        return CompactBaseline() if self.config.get('compact_baseline') else {}
+    
+    def new_stat_cache(self):
+        return CompactStatCache() if self.config.get('compact_baseline') else {}
+    
     def calculate_hash(self, file_path):
         """Calcula hash do arquivo usando algoritmo configurado"""
-        hash_func = getattr(hashlib, self.config['hash_algorithm'])()
-        try:
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_func.update(chunk)
-            return hash_func.hexdigest()
-        except Exception as e:
-            logging.error(f"Erro ao calcular hash de {file_path}: {e}")
-            return None
+        return hash_file(file_path, self.config['hash_algorithm'], self.hash_engine)
     
-    def create_baseline(self):
-        """Cria baseline inicial dos arquivos monitorados"""
-        logging.info("Criando baseline inicial...")
-        self.baseline = {}
-        
+    def iter_files(self):
+        """Percorre os diretórios monitorados e gera (caminho, stat)
+
+        Uma única varredura os.scandir por diretório casa todas as extensões
+        de 'file_types' e os padrões 'include_patterns'/'exclude_patterns'.
+        """
+        scanner = FileScanner.from_config(self.config)
         for directory in self.config['monitored_dirs']:
             if not os.path.exists(directory):
                 logging.warning(f"Diretório não encontrado: {directory}")
                 continue
-                
-            for file_type in self.config['file_types']:
-                for file_path in Path(directory).rglob(f"*{file_type}"):
-                    if file_path.is_file():
-                        file_hash = self.calculate_hash(file_path)
-                        if file_hash:
-                            self.baseline[str(file_path)] = {
-                                'hash': file_hash,
-                                'last_modified': os.path.getmtime(file_path),
-                                'size': os.path.getsize(file_path)
-                            }
+            
+            # mesma forma das raízes de plan_shards (sem barra final)
+            yield from scanner.scan(os.path.normpath(directory))
+    
+    def create_baseline(self, progress_callback=None):
+        """Cria baseline inicial dos arquivos monitorados
+
+        O hashing é distribuído em um pool de threads (hashlib libera a GIL)
+        ou de processos ('baseline_executor: process'), com fila limitada a
+        'baseline_queue_size' tarefas pendentes. Com 'sharding' habilitado,
+        a árvore é dividida em shards entre workers de um ShardCoordinator.
+        progress_callback, se informado, recebe (arquivos_processados,
+        arquivos_na_baseline).
+        """
+        logging.info("Criando baseline inicial...")
+        with self.state_lock:
+            self.baseline = self.new_baseline()
+            self.stat_cache = self.new_stat_cache()
+        
+        workers = self.config.get('baseline_workers') or min(32, (os.cpu_count() or 1) + 4)
+        queue_size = self.config.get('baseline_queue_size') or workers * 4
+        progress_every = self.config.get('progress_every', 1000)
+        algorithm = self.config['hash_algorithm']
+        coordinator = self.shard_coordinator()
+        
+        done_count = 0
+        started = time.perf_counter()
+        # em processos e shards não há cache de hashes: toda entrada foi lida
+        # e é contada ao chegar; em threads, on_read conta só as leituras reais
+        # (acertos do cache vão para hash_cache_requests)
+        count_on_entry = True
+        
+        def record_read(nbytes):
+            if self.metrics.enabled:
+                self.metrics.files_hashed.inc(algorithm=algorithm, kind='baseline')
+                self.metrics.bytes_read.inc(nbytes, algorithm=algorithm, kind='baseline')
+        
+        def add_entry(file_path, entry, signature):
+            nonlocal done_count
+            done_count += 1
+            with self.state_lock:
+                self.baseline[file_path] = entry
+                self.stat_cache[file_path] = (signature, entry['hash'])
+            if count_on_entry:
+                record_read(entry['size'])
+            if progress_every and done_count % progress_every == 0:
+                logging.info(f"Baseline: {done_count} arquivos processados")
+            if progress_callback:
+                progress_callback(done_count, len(self.baseline))
+        
+        def collect(futures):
+            nonlocal done_count
+            for future in futures:
+                result = future.result()
+                if result:
+                    add_entry(*result)
+                else:
+                    done_count += 1
+        
+        if coordinator is not None:
+            coordinator.build_baseline(on_entry=add_entry)
+        else:
+            # o cache de hashes só é compartilhado entre threads do mesmo processo
+            hash_cache = self.hash_cache
+            on_read = None
+            if self.config.get('baseline_executor', 'thread') == 'process':
+                # importado sob demanda: multiprocessing pesa na inicialização da CLI
+                from concurrent.futures import ProcessPoolExecutor
+                executor = ProcessPoolExecutor(max_workers=workers)
+                hash_cache = None
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers)
+                on_read = record_read
+                count_on_entry = False
+            
+            with executor:
+                pending = set()
+                for file_path, stat_info in self.iter_files():
+                    if len(pending) >= queue_size:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(finished)
+                    pending.add(executor.submit(
+                        build_baseline_entry, file_path, algorithm, stat_info, self.sampling,
+                        hash_cache, self.hash_engine, on_read
+                    ))
+                collect(wait(pending)[0])
         
+        if self.metrics.enabled:
+            elapsed = time.perf_counter() - started
+            self.metrics.hash_seconds.inc(elapsed, algorithm=algorithm, kind='baseline')
+            self.metrics.cycle_seconds.observe(elapsed, kind='baseline')
         logging.info(f"Baseline criada com {len(self.baseline)} arquivos")
+        if self.store:
+            self.store.replace_all(self.baseline, self.stat_cache)
+            self.dirty_paths.clear()
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+        if self.history:
+            self.history.record_full(self.baseline, source='baseline')
+        self.reset_status()
         return self.baseline
     
+    def shard_coordinator(self):
+        """ShardCoordinator de config['sharding'], ou None se desabilitado
+
+        Criado uma vez: os workers continuam conectados entre baseline e
+        verificações até shutdown().
+        """
+        if not (self.config.get('sharding') or {}).get('enabled'):
+            return None
+        if self.coordinator is None:
+            try:
+                from .sharding import ShardCoordinator
+            except ImportError:
+                from sharding import ShardCoordinator
+            self.coordinator = ShardCoordinator.from_config(self.config)
+        return self.coordinator
+    
+    def verify_sharded(self):
+        """Verifica toda a baseline nos workers do ShardCoordinator
+
+        Retorna o dicionário de verify_files_against_baseline, com 'new'
+        preenchido e 'failed_shards'; modificados e removidos são alertados.
+        """
+        coordinator = self.shard_coordinator()
+        if coordinator is None:
+            raise RuntimeError("Sharding não habilitado na configuração")
+        start = time.perf_counter()
+        results = coordinator.verify(self.baseline)
+        for file_path in results['unchanged']:
+            self.report_change('unchanged', file_path)
+        for record in results['modified']:
+            self.report_change('modified', record['file_path'], record['current_hash'])
+        for file_path in results['deleted']:
+            self.report_change('deleted', file_path)
+        self.stats.record_scan()
+        if self.metrics.enabled:
+            self.metrics.cycle_seconds.observe(time.perf_counter() - start, kind='sharded')
+        logging.info(f"Verificação distribuída: {len(results['unchanged'])} inalterados, "
+                     f"{len(results['modified'])} modificados, {len(results['new'])} novos, "
+                     f"{len(results['deleted'])} removidos")
+        return results
+    
+    def load_baseline(self):
+        """Carrega a baseline persistida ou cria uma nova se não existir"""
+        if self.store and self.store.count():
+            baseline, stat_cache = self.store.load(self.new_baseline(), self.new_stat_cache())
+            with self.state_lock:
+                self.baseline, self.stat_cache = baseline, stat_cache
+                self.reset_status()
+            self.dirty_paths.clear()
+            return self.baseline
+        return self.create_baseline()
+    
+    def reset_status(self):
+        """Zera o status por arquivo e os contadores após carregar uma baseline"""
+        with self.state_lock:
+            self.file_status = {}
+            self.file_index.rebuild(self.baseline)
+            if self.scheduler:
+                self.scheduler.rebuild(self.baseline)
+            if self.hash_cache is not None:
+                self.hash_cache.reindex(self.baseline)
+            self.stats.reset(len(self.baseline))
+    
+    def update_baseline(self, paths):
+        """Rebaseia os caminhos informados e grava só essas entradas"""
+        algorithm = self.config['hash_algorithm']
+        removed = []
+        for file_path in paths:
+            result = build_baseline_entry(file_path, algorithm, sampling=self.sampling,
+                                          hash_cache=self.hash_cache, engine=self.hash_engine)
+            with self.state_lock:
+                if result:
+                    _, entry, signature = result
+                    self.baseline[file_path] = entry
+                    self.stat_cache[file_path] = (signature, entry['hash'])
+                    self.file_index.add(file_path, entry)
+                    if self.hash_cache is not None:
+                        self.hash_cache.index_path(file_path, entry['hash'])
+                    if self.scheduler:
+                        self.scheduler.add(file_path)
+                elif file_path in self.baseline and not os.path.exists(file_path):
+                    del self.baseline[file_path]
+                    self.stat_cache.pop(file_path, None)
+                    self.file_index.remove(file_path)
+                    if self.scheduler:
+                        self.scheduler.remove(file_path)
+                    if self.hash_cache is not None:
+                        self.hash_cache.unindex_path(file_path)
+                    removed.append(file_path)
+                self.dirty_paths.discard(file_path)
+                self.stats.transition(self.file_status.pop(file_path, None), None)
+                self.file_index.set_status(file_path, 'unchanged')
+        self.stats.set_total(len(self.baseline))
+        
+        if self.store:
+            self.store.upsert_entries(self.baseline, self.stat_cache, paths)
+            self.store.delete_entries(removed)
+        if self.history:
+            self.history.record(
+                {path: self.baseline[path] for path in paths if path in self.baseline},
+                removed, source='update'
+            )
+    
+    def flush_observed(self):
+        """Persiste as observações (stat + hash) alteradas desde o último flush
+
+        Com 'baseline_history', as mesmas observações viram um snapshot delta.
+        """
+        if self.store and self.dirty_paths:
+            self.store.update_observed(self.stat_cache, self.dirty_paths)
+        if self.history and self.dirty_paths:
+            self.record_history(self.dirty_paths)
+        self.dirty_paths.clear()
+        if self.store and self.pending_alerts:
+            self.store.record_alerts(self.pending_alerts)
+        self.pending_alerts = []
+    
+    def record_history(self, paths, source='scan'):
+        """Grava no histórico o estado observado dos caminhos informados"""
+        changed = {}
+        deleted = []
+        for file_path in paths:
+            observed = self.stat_cache.get(file_path)
+            if observed is None:
+                deleted.append(file_path)
+                continue
+            signature, seen_hash = observed
+            changed[file_path] = {'hash': seen_hash, 'size': signature[0],
+                                  'mtime_ns': signature[1]}
+        self.history.record(changed, deleted, source)
+    
+    def check_file(self, file_path, baseline_info, full_rehash=False):
+        """Verifica um arquivo contra a baseline e retorna o status detectado
+
+        No modo rápido (config 'fast_path') o arquivo só é relido quando a
+        assinatura do os.stat difere da última observada. Um stat que falha
+        por outro motivo (ex.: permissão) é registrado e o arquivo fica com
+        status 'error' neste ciclo, sem interromper a varredura.
+        """
+        if self.throttle:
+            self.throttle.consume(ops=1)
+        if self.metrics.enabled:
+            self.metrics.files_stat.inc()
+        try:
+            stat_info = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            with self.state_lock:
+                if self.stat_cache.pop(file_path, None):
+                    self.dirty_paths.add(file_path)
+            return self.report_change('deleted', file_path)
+        except OSError as e:
+            logging.error(f"Erro ao obter stat de {file_path}: {e}")
+            return 'error'
+        
+        signature = file_signature(stat_info)
+        cached = self.stat_cache.get(file_path)
+        fast_path = self.config.get('fast_path', True)
+        
+        if fast_path and not full_rehash and cached and cached[0] == signature:
+            current_hash = cached[1]
+        else:
+            current_hash = self.current_hash(file_path, baseline_info, stat_info, full_rehash)
+            if current_hash and cached != (signature, current_hash):
+                with self.state_lock:
+                    self.stat_cache[file_path] = (signature, current_hash)
+                self.dirty_paths.add(file_path)
+        
+        if current_hash != baseline_info['hash']:
+            status = 'modified'
+        elif self.mtime_changed(stat_info, baseline_info):
+            status = 'metadata'
+        elif stat_info.st_size != baseline_info['size']:
+            status = 'size'
+        else:
+            status = 'unchanged'
+        
+        return self.report_change(status, file_path, current_hash)
+    
+    def report_change(self, status, file_path, current_hash=None):
+        """Alerta a alteração detectada, suprimindo repetições já reportadas
+
+        O índice de alertas é indexado por (caminho, tipo, hash atual): o
+        mesmo estado só volta a alertar após o TTL de 'alert_dedup'.
+        """
+        with self.state_lock:
+            old_status = self.file_status.get(file_path, 'unchanged')
+            if old_status != status:
+                self.stats.transition(old_status, status)
+                if status == 'unchanged':
+                    del self.file_status[file_path]
+                else:
+                    self.file_status[file_path] = status
+                self.file_index.set_status(file_path, status)
+        
+        if status == 'unchanged':
+            if self.alert_index is not None:
+                self.alert_index.discard(file_path)
+            return status
+        
+        if self.alert_index is None or self.alert_index.should_alert(
+                file_path, status, current_hash):
+            message = f"{self.CHANGE_MESSAGES[status]}: {file_path}"
+            timestamp = datetime.now().isoformat()
+            self.alert(message, file_path)
+            self.stats.record_alert(status)
+            self.record_alert_history({
+                'timestamp': timestamp,
+                'type': status,
+                'severity': 'critical' if status in self.stats.CRITICAL else 'warning',
+                'file_path': file_path,
+                'message': message
+            })
+            self.events.publish({
+                'type': 'alert',
+                'status': status,
+                'message': message,
+                'file_path': file_path,
+                'timestamp': timestamp
+            })
+        return status
+    
+    def record_alert_history(self, record):
+        """Guarda o alerta no histórico recente e, se houver store, no banco"""
+        self.alert_history.append(record)
+        if self.store:
+            self.pending_alerts.append(record)
+    
+    def acknowledge(self, paths):
+        """Reconhece alterações: rebaseia os arquivos e limpa seus alertas"""
+        self.update_baseline(paths)
+        if self.alert_index is not None:
+            for file_path in paths:
+                self.alert_index.discard(file_path)
+    
+    def current_hash(self, file_path, baseline_info, stat_info, full_rehash=False):
+        """Hash atual do arquivo, usando o fingerprint amostrado quando possível
+
+        Arquivos de tier 'sample' só são lidos por inteiro quando o
+        fingerprint muda ou no rehash completo periódico. O cache de hashes
+        por inode é consultado fora do rehash completo.
+        """
+        algorithm = self.config['hash_algorithm']
+        fingerprint = baseline_info.get('fingerprint')
+        if fingerprint and self.sampling and not full_rehash:
+            sampled_bytes = min(stat_info.st_size, self.sampling.samples * self.sampling.block_size)
+            if self.throttle:
+                self.throttle.consume(sampled_bytes)
+            start = time.perf_counter()
+            current = self.sampling.fingerprint(file_path, algorithm, stat_info.st_size)
+            if self.metrics.enabled:
+                self.metrics.record_hash(algorithm, sampled_bytes,
+                                         time.perf_counter() - start, kind='sample')
+            if current == fingerprint:
+                return baseline_info['hash']
+            logging.info(f"Fingerprint alterado, calculando hash completo: {file_path}")
+        if self.hash_cache is not None:
+            return self.hash_cache.get_or_compute(
+                file_path, algorithm, lambda path: self.read_hash(path, stat_info),
+                stat_info, refresh=full_rehash
+            )
+        return self.read_hash(file_path, stat_info)
+    
+    def read_hash(self, file_path, stat_info):
+        """Lê o arquivo inteiro para o hash, respeitando o orçamento de I/O"""
+        if self.throttle:
+            self.throttle.consume(stat_info.st_size)
+        start = time.perf_counter()
+        file_hash = self.calculate_hash(file_path)
+        if self.metrics.enabled:
+            self.metrics.record_hash(self.config['hash_algorithm'], stat_info.st_size,
+                                     time.perf_counter() - start)
+        return file_hash
+    
+    @staticmethod
+    def mtime_changed(stat_info, baseline_info):
+        baseline_mtime_ns = baseline_info.get('mtime_ns')
+        if baseline_mtime_ns is not None:
+            return stat_info.st_mtime_ns != baseline_mtime_ns
+        return stat_info.st_mtime != baseline_info['last_modified']
+    
+    def run_cycle(self, full_rehash=None):
+        """Executa um ciclo de verificação sobre toda a baseline
+
+        A cada 'full_rehash_every' ciclos (ou com full_rehash=True) todos os
+        arquivos são rehasheados, detectando adulterações que preservam
+        mtime/tamanho. Com 'sharding' habilitado o ciclo roda nos workers
+        (verify_sharded, sempre com rehash completo).
+        """
+        self.cycle_count += 1
+        if self.shard_coordinator() is not None:
+            results = self.verify_sharded()
+            statuses = dict.fromkeys(results['unchanged'], 'unchanged')
+            statuses.update((record['file_path'], 'modified') for record in results['modified'])
+            statuses.update(dict.fromkeys(results['deleted'], 'deleted'))
+            statuses.update(dict.fromkeys(results['new'], 'new'))
+            return statuses
+        if full_rehash is None:
+            full_every = self.config.get('full_rehash_every', 10)
+            full_rehash = bool(full_every) and self.cycle_count % full_every == 0
+        if full_rehash:
+            logging.info(f"Ciclo {self.cycle_count}: rehash completo")
+        
+        start = time.perf_counter()
+        results = {}
+        for file_path, baseline_info in self.baseline.items():
+            results[file_path] = self.check_file(file_path, baseline_info, full_rehash)
+        self.flush_observed()
+        self.stats.record_scan()
+        if self.metrics.enabled:
+            self.metrics.cycle_seconds.observe(time.perf_counter() - start,
+                                               kind='full' if full_rehash else 'fast')
+        return results
+    
     def monitor_files(self):
         """Monitora arquivos em busca de alterações"""
+        if self.config.get('monitor_mode', 'poll') == 'events':
+            return self.monitor_events()
+        if self.scheduler:
+            return self.monitor_scheduled()
+        
         logging.info("Iniciando monitoramento...")
         
         while True:
-            for file_path, baseline_info in self.baseline.items():
-                if not os.path.exists(file_path):
-                    self.alert(f"ARQUIVO REMOVIDO: {file_path}")
-                    continue
-                
-                current_hash = self.calculate_hash(file_path)
-                current_mtime = os.path.getmtime(file_path)
-                current_size = os.path.getsize(file_path)
-                
-                if current_hash != baseline_info['hash']:
-                    self.alert(f"ARQUIVO MODIFICADO: {file_path}")
-                
-                elif current_mtime != baseline_info['last_modified']:
-                    self.alert(f"METADADO ALTERADO: {file_path}")
-                
-                elif current_size != baseline_info['size']:
-                    self.alert(f"TAMANHO ALTERADO: {file_path}")
-            
+            self.run_cycle()
             time.sleep(self.config['check_interval'])
     
-    def alert(self, message):
-        """Envia alerta de detecção"""
+    def run_scheduled(self, now=None):
+        """Verifica a fatia de cada tier do 'scan_schedule' vencida até agora
+
+        Cada tier faz rehash completo a cada 'full_rehash_every' voltas
+        completas sobre os seus arquivos.
+        """
+        full_every = self.config.get('full_rehash_every', 10)
+        start = time.perf_counter()
+        results = {}
+        for tier, paths in self.scheduler.due(now):
+            full_rehash = bool(full_every) and tier.passes % full_every == full_every - 1
+            for file_path in paths:
+                baseline_info = self.baseline.get(file_path)
+                if baseline_info is not None:
+                    results[file_path] = self.check_file(file_path, baseline_info, full_rehash)
+        self.flush_observed()
+        if results:
+            self.stats.record_scan()
+            if self.metrics.enabled:
+                self.metrics.cycle_seconds.observe(time.perf_counter() - start, kind='scheduled')
+        return results
+    
+    def monitor_scheduled(self):
+        """Monitora com intervalos por padrão de caminho ('scan_schedule')
+
+        Em vez de um ciclo completo a cada 'check_interval', cada tier
+        espalha suas verificações ao longo do próprio intervalo, verificando
+        um pouco a cada 'schedule_tick' segundos.
+        """
+        logging.info("Iniciando monitoramento agendado...")
+        tick = self.config.get('schedule_tick', 1.0)
+        self.scheduler.due()
+        
+        while True:
+            time.sleep(tick)
+            self.run_scheduled()
+    
+    def check_paths(self, paths):
+        """Verifica apenas os caminhos informados que estão na baseline"""
+        results = {}
+        for file_path in paths:
+            baseline_info = self.baseline.get(file_path)
+            if baseline_info is not None:
+                results[file_path] = self.check_file(file_path, baseline_info)
+        self.flush_observed()
+        return results
+    
+    def monitor_events(self):
+        """Monitora arquivos a partir de eventos do sistema de arquivos
+
+        Os eventos do watchdog (inotify no Linux) enfileiram só os caminhos
+        afetados, com debounce para rajadas de escrita. Uma varredura completa
+        roda a cada 'event_fallback_interval' segundos ou quando a fila estoura.
+        """
+        if not self.start_events():
+            return self.monitor_files()
+        
+        logging.info("Iniciando monitoramento por eventos...")
+        try:
+            while True:
+                time.sleep(self.event_tick())
+                self.run_events()
+        finally:
+            self.stop_events()
+    
+    def start_events(self):
+        """Liga o observer do watchdog sobre uma EventQueue
+
+        Retorna False, com 'monitor_mode' trocado para 'poll', se o watchdog
+        não estiver instalado.
+        """
+        self.event_queue = EventQueue(
+            debounce=self.config.get('event_debounce', 0.5),
+            max_delay=self.config.get('event_max_delay', 5.0),
+            max_size=self.config.get('event_queue_size', 100000)
+        )
+        directories = [d for d in self.config['monitored_dirs'] if os.path.exists(d)]
+        try:
+            self.observer = start_observer(directories, self.event_queue)
+        except ImportError as e:
+            logging.warning(f"Modo por eventos indisponível ({e}), usando polling")
+            self.config['monitor_mode'] = 'poll'
+            self.event_queue = None
+            return False
+        self.last_poll = time.monotonic()
+        return True
+    
+    def event_tick(self):
+        """Intervalo entre passos de run_events"""
+        return min(self.event_queue.debounce, 1.0) or 0.1
+    
+    def run_events(self, now=None):
+        """Um passo do modo por eventos: verifica os caminhos prontos da fila
+
+        Faz um ciclo completo quando a fila estoura ou a cada
+        'event_fallback_interval' segundos.
+        """
+        now = time.monotonic() if now is None else now
+        fallback_interval = self.config.get('event_fallback_interval',
+                                            self.config['check_interval'])
+        if self.event_queue.overflowed or now - self.last_poll >= fallback_interval:
+            if self.event_queue.overflowed:
+                logging.warning("Fila de eventos estourada, varredura completa")
+            self.event_queue.clear()
+            results = self.run_cycle()
+            self.last_poll = time.monotonic()
+            return results
+        return self.check_paths(self.event_queue.pop_ready(now))
+    
+    def stop_events(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+    
+    def setup_alerts(self):
+        """Liga o despacho assíncrono de alertas (Telegram/Email) do AlertSystem"""
+        try:
+            from .alerts import AlertSystem
+        except ImportError:
+            from alerts import AlertSystem
+        self.alert_system = AlertSystem(self.config)
+        self.alert_system.start_dispatcher()
+    
+    def alert(self, message, file_path=None):
+        """Envia alerta de detecção
+
+        A entrega aos canais externos é enfileirada e nunca bloqueia a
+        varredura; alertas do mesmo tipo são agrupados pelo dispatcher.
+        """
         logging.warning(message)
         print(f"ALERTA: {message}")
+        if self.alert_system:
+            subject = message.partition(':')[0] if file_path else 'PyWatchdog'
+            self.alert_system.enqueue_alert(subject, message, file_path)
+    
+    def shutdown(self):
+        """Entrega alertas pendentes e fecha recursos"""
+        self.stop_events()
+        if self.alert_system:
+            self.alert_system.stop_dispatcher()
+        if self.store:
+            self.store.close()
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+        if self.history:
+            self.history.close()
+        if self.coordinator is not None:
+            self.coordinator.close()
 
 if __name__ == "__main__":
     monitor = FileIntegrityMonitor()
-    monitor.create_baseline()
+    monitor.load_baseline()
     monitor.monitor_files()
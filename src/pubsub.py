@@ -0,0 +1,128 @@
+import time
+import queue
+import logging
+import threading
+
+
+class Subscription:
+    """Assinante do barramento com buffer limitado"""
+
+    def __init__(self, maxsize=100):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def get(self, timeout=None):
+        """Próximo evento ou None se nada chegar dentro do timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Pub/sub em processo entre o monitor e os clientes do dashboard
+
+    publish() nunca bloqueia: um assinante lento cujo buffer enche é
+    desconectado (o cliente SSE reconecta e volta a receber do ponto atual).
+    """
+
+    def __init__(self, buffer_size=100):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, maxsize=None):
+        subscription = Subscription(maxsize or self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        if not self._subscribers:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                logging.warning("Assinante de eventos lento desconectado")
+                self.unsubscribe(subscription)
+
+
+class MonitorStats:
+    """Contadores do monitor mantidos incrementalmente a cada mudança de status"""
+
+    CHANGED = ('modified', 'metadata', 'size')
+    CRITICAL = ('modified', 'deleted')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total_files=0):
+        with self._lock:
+            self.total_files = total_files
+            self.modified_files = 0
+            self.deleted_files = 0
+            self.critical_alerts = 0
+            self.total_alerts = 0
+            self.last_scan = None
+
+    def set_total(self, total_files):
+        with self._lock:
+            self.total_files = total_files
+
+    def _bucket(self, status):
+        if status in self.CHANGED:
+            return 'modified_files'
+        if status == 'deleted':
+            return 'deleted_files'
+        return None
+
+    def transition(self, old_status, new_status):
+        """Move um arquivo de um status para outro"""
+        old_bucket = self._bucket(old_status)
+        new_bucket = self._bucket(new_status)
+        if old_bucket == new_bucket:
+            return
+        with self._lock:
+            if old_bucket:
+                setattr(self, old_bucket, getattr(self, old_bucket) - 1)
+            if new_bucket:
+                setattr(self, new_bucket, getattr(self, new_bucket) + 1)
+
+    def record_alert(self, status):
+        with self._lock:
+            self.total_alerts += 1
+            if status in self.CRITICAL:
+                self.critical_alerts += 1
+
+    def record_scan(self):
+        with self._lock:
+            self.last_scan = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'total_files': self.total_files,
+                'unchanged_files': self.total_files - self.modified_files - self.deleted_files,
+                'modified_files': self.modified_files,
+                'deleted_files': self.deleted_files,
+                'critical_alerts': self.critical_alerts,
+                'total_alerts': self.total_alerts,
+                'last_scan': self.last_scan
+            }
+
+
+# Instâncias compartilhadas entre o monitor e o dashboard no mesmo processo
+event_bus = EventBus()
+monitor_stats = MonitorStats()
@@ -0,0 +1,88 @@
+import os
+import re
+import fnmatch
+import logging
+
+try:
+    from .hash_engine import new_hash
+except ImportError:
+    from hash_engine import new_hash
+
+
+def sample_fingerprint(file_path, algorithm='sha256', samples=16, block_size=65536, size=None):
+    """Fingerprint barato: tamanho + bloco inicial + bloco final + N blocos espaçados
+
+    Arquivos pequenos demais para amostragem são lidos por inteiro.
+    """
+    try:
+        if size is None:
+            size = os.path.getsize(file_path)
+        hash_func = new_hash(algorithm)
+        hash_func.update(size.to_bytes(8, 'little'))
+
+        with open(file_path, 'rb', buffering=0) as f:
+            if size <= block_size * (samples + 2):
+                hash_func.update(f.readall())
+                return hash_func.hexdigest()
+
+            last = size - block_size
+            offsets = [0] + [last * i // (samples + 1) for i in range(1, samples + 1)] + [last]
+            buffer = bytearray(block_size)
+            view = memoryview(buffer)
+            for offset in offsets:
+                f.seek(offset)
+                n = f.readinto(buffer)
+                hash_func.update(view[:n])
+        return hash_func.hexdigest()
+    except Exception as e:
+        logging.error(f"Erro ao calcular fingerprint de {file_path}: {e}")
+        return None
+
+
+class SamplingPolicy:
+    """Decide por arquivo se a verificação usa fingerprint amostrado ou hash completo
+
+    Arquivos que casam com 'exclude_patterns' sempre usam hash completo; os que
+    casam com 'patterns' ou têm pelo menos 'min_size' bytes são amostrados.
+    """
+
+    def __init__(self, min_size=1 << 30, patterns=None, exclude_patterns=None,
+                 samples=16, block_size=65536):
+        self.min_size = min_size
+        self.patterns = self._compile(patterns)
+        self.exclude = self._compile(exclude_patterns)
+        self.samples = samples
+        self.block_size = block_size
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria a política a partir de config['sampled_hashing'] (ou None se desativada)"""
+        options = config.get('sampled_hashing') or {}
+        if not options.get('enabled'):
+            return None
+        return cls(
+            min_size=options.get('min_size', 1 << 30),
+            patterns=options.get('patterns'),
+            exclude_patterns=options.get('exclude_patterns'),
+            samples=options.get('samples', 16),
+            block_size=options.get('block_size', 65536)
+        )
+
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return None
+        return re.compile('|'.join(fnmatch.translate(p) for p in patterns))
+
+    def tier_for(self, file_path, size):
+        """Retorna 'sample' ou 'full' para o arquivo"""
+        if self.exclude and self.exclude.match(file_path):
+            return 'full'
+        if self.patterns and self.patterns.match(file_path):
+            return 'sample'
+        if self.min_size is not None and size >= self.min_size:
+            return 'sample'
+        return 'full'
+
+    def fingerprint(self, file_path, algorithm, size=None):
+        return sample_fingerprint(file_path, algorithm, self.samples, self.block_size, size)
@@ -0,0 +1,102 @@
+import os
+import re
+import fnmatch
+import logging
+
+
+class FileScanner:
+    """Percorre diretórios com uma única passada de os.scandir
+
+    Todas as extensões são comparadas de uma vez contra uma tupla de sufixos
+    pré-compilada, e os padrões de inclusão/exclusão viram uma única regex.
+    """
+
+    def __init__(self, file_types=None, include_patterns=None, exclude_patterns=None,
+                 max_depth=None, follow_symlinks=False):
+        self.suffixes = tuple(file_types) if file_types else None
+        self.include = self._compile(include_patterns)
+        self.exclude = self._compile(exclude_patterns)
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o scanner a partir do dicionário de configuração"""
+        return cls(
+            file_types=config.get('file_types'),
+            include_patterns=config.get('include_patterns'),
+            exclude_patterns=config.get('exclude_patterns'),
+            max_depth=config.get('max_depth'),
+            follow_symlinks=config.get('follow_symlinks', False)
+        )
+
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return None
+        return re.compile('|'.join(fnmatch.translate(p) for p in patterns))
+
+    def matches(self, path, name):
+        """Indica se o arquivo deve ser monitorado"""
+        if self.suffixes and not name.endswith(self.suffixes):
+            return False
+        if self.include and not self.include.match(path):
+            return False
+        if self.exclude and self.exclude.match(path):
+            return False
+        return True
+
+    def scan(self, directory, depth=0, recursive=True):
+        """Gera (caminho, stat) para cada arquivo monitorado em directory
+
+        depth é a profundidade de directory em relação ao diretório
+        monitorado (para respeitar max_depth ao varrer só uma subárvore);
+        com recursive=False só os arquivos do próprio diretório são gerados.
+        """
+        visited = set()
+        if self.follow_symlinks:
+            st = os.stat(directory)
+            visited.add((st.st_dev, st.st_ino))
+        stack = [(directory, depth)]
+
+        while stack:
+            current, depth = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                                if not recursive:
+                                    continue
+                                if self.max_depth is not None and depth >= self.max_depth:
+                                    continue
+                                if self.exclude and self.exclude.match(entry.path):
+                                    continue
+                                if self.follow_symlinks:
+                                    st = entry.stat()
+                                    key = (st.st_dev, st.st_ino)
+                                    if key in visited:
+                                        continue
+                                    visited.add(key)
+                                stack.append((entry.path, depth + 1))
+                            elif entry.is_file() and self.matches(entry.path, entry.name):
+                                yield entry.path, entry.stat()
+                        except OSError as e:
+                            logging.warning(f"Erro ao ler {entry.path}: {e}")
+            except OSError as e:
+                logging.warning(f"Erro ao listar diretório {current}: {e}")
+
+    def subdirectories(self, directory, depth=0):
+        """Subdiretórios que scan() visitaria logo abaixo de directory"""
+        if self.max_depth is not None and depth >= self.max_depth:
+            return []
+        try:
+            with os.scandir(directory) as entries:
+                return sorted(
+                    entry.path for entry in entries
+                    if entry.is_dir(follow_symlinks=self.follow_symlinks)
+                    and not (self.exclude and self.exclude.match(entry.path))
+                )
+        except OSError as e:
+            logging.warning(f"Erro ao listar diretório {directory}: {e}")
+            return []
@@ -0,0 +1,196 @@
+import re
+import os
+import time
+import fnmatch
+import logging
+
+
+class ScanTier:
+    """Grupo de arquivos verificados com o mesmo intervalo
+
+    paths guarda a ordem do round-robin e positions o índice de cada
+    caminho, então add/remove são O(1): um caminho removido vira None em
+    paths e a lista é compactada quando os removidos passam dos vivos.
+    """
+
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self.paths = []
+        self.positions = {}
+        self.cursor = 0
+        self.carry = 0.0
+        self.passes = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, path):
+        if path not in self.positions:
+            self.positions[path] = len(self.paths)
+            self.paths.append(path)
+
+    def remove(self, path):
+        index = self.positions.pop(path, None)
+        if index is None:
+            return
+        self.paths[index] = None
+        if len(self.paths) > 2 * len(self.positions):
+            self._compact()
+
+    def _compact(self):
+        paths = [path for path in self.paths[:self.cursor] if path is not None]
+        cursor = len(paths)
+        paths.extend(path for path in self.paths[self.cursor:] if path is not None)
+        self.paths = paths
+        self.cursor = cursor
+        self.positions = {path: index for index, path in enumerate(paths)}
+
+
+class ScanScheduler:
+    """Distribui as verificações de cada tier uniformemente no seu intervalo
+
+    Cada regra de 'scan_schedule' associa um padrão glob a um intervalo; o
+    primeiro padrão que casar define o tier do arquivo e os demais usam
+    'check_interval'. A cada tick, cada tier verifica a fração dos seus
+    arquivos proporcional ao tempo decorrido, em round-robin, em vez de
+    verificar tudo de uma vez no início do intervalo.
+    """
+
+    def __init__(self, rules=None, default_interval=300):
+        self.rules = [(re.compile(fnmatch.translate(rule['pattern'])), rule['interval'])
+                      for rule in rules or []]
+        self.tiers = [ScanTier(rule.get('name', rule['pattern']), rule['interval'])
+                      for rule in rules or []]
+        self.tiers.append(ScanTier('default', default_interval))
+        self.last_tick = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o agendador a partir de config['scan_schedule'] (ou None)"""
+        rules = config.get('scan_schedule')
+        if not rules:
+            return None
+        return cls(rules, config['check_interval'])
+
+    def tier_for(self, path):
+        for index, (pattern, _) in enumerate(self.rules):
+            if pattern.match(path):
+                return self.tiers[index]
+        return self.tiers[-1]
+
+    def rebuild(self, paths):
+        for tier in self.tiers:
+            tier.paths = []
+            tier.positions = {}
+            tier.cursor = 0
+            tier.carry = 0.0
+        for path in paths:
+            self.tier_for(path).add(path)
+        self.last_tick = None
+
+    def add(self, path):
+        self.tier_for(path).add(path)
+
+    def remove(self, path):
+        self.tier_for(path).remove(path)
+
+    def due(self, now=None):
+        """Retorna [(tier, [caminhos])] a verificar desde o último tick
+
+        Um tier que completa uma volta inteira incrementa tier.passes.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = 0.0 if self.last_tick is None else now - self.last_tick
+        self.last_tick = now
+
+        batches = []
+        for tier in self.tiers:
+            total = len(tier)
+            if not total or not tier.interval:
+                continue
+            tier.carry += min(total, total * elapsed / tier.interval)
+            count = int(tier.carry)
+            if not count:
+                continue
+            tier.carry -= count
+
+            batch = []
+            while len(batch) < count:
+                if tier.cursor >= len(tier.paths):
+                    tier.cursor = 0
+                    tier.passes += 1
+                path = tier.paths[tier.cursor]
+                tier.cursor += 1
+                if path is not None:
+                    batch.append(path)
+            batches.append((tier, batch))
+        return batches
+
+
+class IOThrottle:
+    """Limita bytes/s e operações/s da varredura com espera (backoff)
+
+    Funciona como dois token buckets com capacidade de um segundo; quando o
+    orçamento acaba, consume() dorme até haver crédito suficiente.
+    """
+
+    def __init__(self, bytes_per_sec=None, iops=None):
+        self.bytes_per_sec = bytes_per_sec
+        self.iops = iops
+        self.byte_tokens = float(bytes_per_sec or 0)
+        self.op_tokens = float(iops or 0)
+        self.updated = time.monotonic()
+        self.throttled_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        options = config.get('io_limits') or {}
+        if not options.get('bytes_per_sec') and not options.get('iops'):
+            return None
+        if options.get('io_class'):
+            apply_io_priority(options['io_class'])
+        return cls(options.get('bytes_per_sec'), options.get('iops'))
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        if self.bytes_per_sec:
+            self.byte_tokens = min(self.bytes_per_sec, self.byte_tokens + elapsed * self.bytes_per_sec)
+        if self.iops:
+            self.op_tokens = min(self.iops, self.op_tokens + elapsed * self.iops)
+
+    def consume(self, nbytes=0, ops=1):
+        self._refill()
+        wait = 0.0
+        if self.bytes_per_sec and nbytes:
+            self.byte_tokens -= nbytes
+            if self.byte_tokens < 0:
+                wait = max(wait, -self.byte_tokens / self.bytes_per_sec)
+        if self.iops and ops:
+            self.op_tokens -= ops
+            if self.op_tokens < 0:
+                wait = max(wait, -self.op_tokens / self.iops)
+        if wait > 0:
+            self.throttled_seconds += wait
+            time.sleep(wait)
+
+
+IO_CLASSES = {'realtime': '1', 'best-effort': '2', 'idle': '3'}
+
+
+def apply_io_priority(io_class):
+    """Ajusta a prioridade de I/O do processo via ionice, se disponível"""
+    import shutil
+    import subprocess
+
+    ionice = shutil.which('ionice')
+    if not ionice or io_class not in IO_CLASSES:
+        logging.warning(f"Não foi possível aplicar a classe de I/O {io_class}")
+        return False
+    result = subprocess.run(
+        [ionice, '-c', IO_CLASSES[io_class], '-p', str(os.getpid())],
+        capture_output=True
+    )
+    return result.returncode == 0
@@ -0,0 +1,225 @@
+import time
+import uuid
+import queue
+import logging
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+try:
+    from .monitor import FileIntegrityMonitor
+except ImportError:
+    from monitor import FileIntegrityMonitor
+
+
+class MonitorService:
+    """Executa o FileIntegrityMonitor em uma thread de fundo gerenciada
+
+    A thread segue o mesmo modo de monitor_files (eventos, agendado ou
+    ciclos completos, distribuídos com 'sharding') e também atende
+    verificações sob demanda enfileiradas por submit_scan(). As rotas Flask
+    só leem snapshot()/get_job() e, para baseline/status, seguram o
+    state_lock do monitor, que a varredura só segura por instantes em cada
+    arquivo.
+    Um erro em um ciclo ou job fica em 'last_error' e o loop continua.
+    """
+
+    def __init__(self, config_path="config/config.yaml", max_jobs=100):
+        self.config_path = config_path
+        self.max_jobs = max_jobs
+        self.monitor = None
+        self.thread = None
+        self._jobs = OrderedDict()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._state = {
+            'running': False,
+            'ready': False,
+            'cycle_count': 0,
+            'last_cycle_seconds': None,
+            'last_error': None
+        }
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return self
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="pywatchdog-monitor", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._queue.put(None)
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _update_state(self, **values):
+        with self._lock:
+            self._state.update(values)
+
+    def snapshot(self):
+        """Cópia consistente do estado do serviço e dos contadores do monitor"""
+        with self._lock:
+            state = dict(self._state)
+            state['queued_jobs'] = self._queue.qsize()
+        if self.monitor is not None:
+            state.update(self.monitor.stats.snapshot())
+        return state
+
+    def list_files(self, **filters):
+        """Página da listagem de arquivos (ver FileIndex.page)
+
+        A ordenação por tamanho/data é construída antes, fora de state_lock.
+        """
+        if self.monitor is None:
+            return {'files': [], 'next_cursor': None}
+        self.monitor.file_index.prepare(filters.get('sort', 'path'), self.monitor.baseline,
+                                        self.monitor.state_lock)
+        with self.monitor.state_lock:
+            return self.monitor.file_index.page(self.monitor.baseline, **filters)
+
+    def file_detail(self, file_path):
+        """Entrada da baseline, status e última observação de um arquivo"""
+        if self.monitor is None:
+            return None
+        with self.monitor.state_lock:
+            entry = self.monitor.baseline.get(file_path)
+            if entry is None:
+                return None
+            status = self.monitor.file_status.get(file_path, 'unchanged')
+            observed = self.monitor.stat_cache.get(file_path)
+        detail = self.monitor.file_index.describe(file_path, entry, status)
+        detail['mtime_ns'] = entry.get('mtime_ns')
+        if observed:
+            detail['observed_hash'] = observed[1]
+        return detail
+
+    def file_history(self, file_path, at=None, limit=None):
+        """Versões de um arquivo no histórico, ou a versão vigente em 'at'
+
+        Retorna None se 'baseline_history' não estiver habilitado.
+        """
+        if self.monitor is None or not self.monitor.history:
+            return None
+        if at is not None:
+            return self.monitor.history.entry_at(file_path, at)
+        return self.monitor.history.file_history(file_path, limit)
+
+    def content_paths(self, digest):
+        """Caminhos que compartilham o conteúdo com este hash (None sem hash_cache)"""
+        if self.monitor is None or self.monitor.hash_cache is None:
+            return None
+        return self.monitor.hash_cache.paths_for(digest.lower())
+
+    def submit_scan(self, paths=None, full=False):
+        """Enfileira uma verificação sob demanda e retorna o id do job"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'paths': list(paths) if paths else None,
+            'full': bool(full),
+            'created': datetime.now().isoformat(),
+            'started': None,
+            'finished': None,
+            'result': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        self._queue.put(job_id)
+        return job_id
+
+    def get_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update_job(self, job_id, **values):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(values)
+                return dict(job)
+
+    def _run(self):
+        self._update_state(running=True)
+        try:
+            self.monitor = FileIntegrityMonitor(self.config_path)
+            self.monitor.load_baseline()
+            self._update_state(ready=True)
+            # mesmos modos de monitor_files: eventos, agendado ou ciclos completos
+            # (que rodam nos workers com 'sharding', ver run_cycle)
+            if (self.monitor.config.get('monitor_mode', 'poll') == 'events'
+                    and self.monitor.start_events()):
+                interval = self.monitor.event_tick()
+                step = self.monitor.run_events
+            elif self.monitor.scheduler:
+                interval = self.monitor.config.get('schedule_tick', 1.0)
+                self.monitor.scheduler.due()
+                step = self.monitor.run_scheduled
+            else:
+                interval = self.monitor.config['check_interval']
+                step = self.monitor.run_cycle
+            next_cycle = time.monotonic() + interval
+
+            while not self._stop.is_set():
+                timeout = max(0.0, next_cycle - time.monotonic())
+                try:
+                    job_id = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    job_id = None
+
+                if self._stop.is_set():
+                    break
+                if job_id is not None:
+                    self._run_job(job_id)
+                    continue
+
+                try:
+                    self._step(step)
+                except Exception as e:
+                    logging.exception(f"Erro no ciclo de monitoramento: {e}")
+                    self._update_state(last_error=str(e))
+                next_cycle = time.monotonic() + interval
+        except Exception as e:
+            # só a inicialização (config/baseline) chega aqui
+            logging.error(f"Erro no monitoramento em background: {e}")
+            self._update_state(last_error=str(e))
+        finally:
+            if self.monitor is not None:
+                self.monitor.shutdown()
+            self._update_state(running=False)
+
+    def _step(self, step, *args):
+        start = time.perf_counter()
+        results = step(*args)
+        self._update_state(
+            cycle_count=self.monitor.cycle_count,
+            last_cycle_seconds=time.perf_counter() - start
+        )
+        return results
+
+    def _cycle(self, full_rehash=None):
+        return self._step(self.monitor.run_cycle, full_rehash)
+
+    def _run_job(self, job_id):
+        job = self._update_job(job_id, status='running', started=datetime.now().isoformat())
+        if job is None:
+            return
+        try:
+            if job['paths']:
+                results = self.monitor.check_paths(job['paths'])
+            else:
+                results = self._cycle(full_rehash=job['full'])
+            self._update_job(job_id, status='done', result=dict(Counter(results.values())),
+                             finished=datetime.now().isoformat())
+        except Exception as e:
+            logging.error(f"Erro na verificação {job_id}: {e}")
+            self._update_state(last_error=str(e))
+            self._update_job(job_id, status='error', error=str(e),
+                             finished=datetime.now().isoformat())
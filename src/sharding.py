@@ -0,0 +1,659 @@
+"""Varredura distribuída: coordenador e workers por shards da árvore
+
+O coordenador divide os diretórios monitorados em shards (subárvores até
+'shard_depth' ou buckets do hash do caminho), entrega um shard por vez a
+cada worker conectado por multiprocessing.connection (socket TCP ou Unix)
+e junta as baselines parciais e os resultados de verificação. Um shard
+cujo worker morre ou para de enviar heartbeat volta para a fila e é
+entregue a outro worker. Os workers ficam conectados entre execuções até
+ShardCoordinator.close(), e só recebem da configuração as chaves de
+WORKER_CONFIG_KEYS (nada de senhas SMTP, tokens ou authkey).
+
+Uso (workers em outras máquinas precisam da mesma árvore montada):
+    python -m src.sharding baseline --config config/config.yaml --workers 4
+    python -m src.sharding verify --config config/config.yaml --workers 4
+    PYWATCHDOG_SHARD_KEY=segredo python -m src.sharding worker --connect host:7300
+"""
+import os
+import sys
+import time
+import zlib
+import queue
+import logging
+import platform
+import threading
+
+try:
+    from .scanner import FileScanner
+    from .sampling import SamplingPolicy
+    from .hash_engine import HashEngine
+    from .monitor import build_baseline_entry, hash_file
+except ImportError:
+    from scanner import FileScanner
+    from sampling import SamplingPolicy
+    from hash_engine import HashEngine
+    from monitor import build_baseline_entry, hash_file
+
+VERIFY_KEYS = ('unchanged', 'modified', 'new', 'deleted', 'errors')
+
+# o que run_shard usa (FileScanner, SamplingPolicy, HashEngine e o algoritmo)
+WORKER_CONFIG_KEYS = (
+    'monitored_dirs', 'hash_algorithm', 'file_types', 'include_patterns',
+    'exclude_patterns', 'max_depth', 'follow_symlinks', 'sampled_hashing', 'hash_engine'
+)
+
+
+def worker_config(config):
+    """Subconjunto da configuração enviado aos workers, sem credenciais"""
+    return {key: config[key] for key in WORKER_CONFIG_KEYS if key in config}
+
+
+def path_bucket(path, count):
+    """Bucket estável de um caminho (o mesmo em qualquer processo ou máquina)"""
+    return zlib.crc32(os.fsencode(path)) % count
+
+
+def plan_shards(directories, scanner, strategy='subtree', shard_depth=1, hash_shards=16):
+    """Divide os diretórios monitorados em shards
+
+    'subtree' gera um shard por subárvore em shard_depth níveis abaixo de
+    cada diretório, mais um shard 'files' com os arquivos soltos de cada
+    diretório acima desse nível. 'hash' gera hash_shards buckets por
+    crc32 do caminho, úteis quando a árvore é rasa ou desbalanceada: a
+    árvore é percorrida uma única vez aqui e cada shard leva a lista dos
+    seus caminhos, então os workers só fazem stat e hash.
+    """
+    # sem barra final: as raízes são comparadas com os.path.dirname em ShardMap
+    directories = [os.path.normpath(d) for d in directories if os.path.isdir(d)]
+    if strategy == 'hash':
+        buckets = [[] for _ in range(hash_shards)]
+        for directory in directories:
+            for path, _ in scanner.scan(directory):
+                buckets[path_bucket(path, hash_shards)].append(path)
+        return [{'id': f"hash:{index}/{hash_shards}", 'kind': 'hash', 'paths': paths,
+                 'index': index, 'count': hash_shards} for index, paths in enumerate(buckets)]
+
+    shards = []
+    for directory in directories:
+        level = [(directory, 0)]
+        for _ in range(shard_depth):
+            below = []
+            for path, depth in level:
+                subdirs = scanner.subdirectories(path, depth)
+                if not subdirs:
+                    # sem subdiretórios a varrer: a própria subárvore é o shard
+                    below.append((path, depth))
+                    continue
+                shards.append({'id': f"files:{path}", 'kind': 'files', 'root': path,
+                               'depth': depth})
+                below.extend((subdir, depth + 1) for subdir in subdirs)
+            level = below
+        shards.extend({'id': f"subtree:{path}", 'kind': 'subtree', 'root': path,
+                       'depth': depth} for path, depth in level)
+    return shards
+
+
+class ShardMap:
+    """Localiza o shard responsável por um caminho da baseline"""
+
+    def __init__(self, shards):
+        self.files = {}
+        self.subtrees = {}
+        self.buckets = {}
+        self.count = None
+        for shard in shards:
+            if shard['kind'] == 'files':
+                self.files[os.path.normpath(shard['root'])] = shard['id']
+            elif shard['kind'] == 'subtree':
+                self.subtrees[os.path.normpath(shard['root'])] = shard['id']
+            elif shard['kind'] == 'hash':
+                self.buckets[shard['index']] = shard['id']
+                self.count = shard['count']
+
+    def shard_for(self, path):
+        if self.count:
+            return self.buckets.get(path_bucket(path, self.count))
+        current = os.path.dirname(os.path.normpath(path))
+        if current in self.files:
+            return self.files[current]
+        while True:
+            if current in self.subtrees:
+                return self.subtrees[current]
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None
+            current = parent
+
+    def partition(self, baseline):
+        """Separa a baseline por shard; caminhos sem shard ficam em 'orphans'
+
+        Só o hash de cada entrada é enviado aos workers.
+        """
+        parts = {}
+        orphans = {}
+        for path, entry in baseline.items():
+            shard_id = self.shard_for(path)
+            target = orphans if shard_id is None else parts.setdefault(shard_id, {})
+            target[path] = entry['hash']
+        return parts, orphans
+
+
+def iter_shard(shard, scanner):
+    """Gera (caminho, stat) dos arquivos de um shard"""
+    kind = shard['kind']
+    if kind == 'subtree':
+        yield from scanner.scan(shard['root'], shard['depth'])
+    elif kind == 'files':
+        yield from scanner.scan(shard['root'], shard['depth'], recursive=False)
+    elif kind in ('hash', 'paths'):
+        for path in shard['paths']:
+            try:
+                yield path, os.stat(path)
+            except OSError:
+                continue
+
+
+def run_shard(shard, config, task, expected=None, send=None, batch_size=1000):
+    """Processa um shard e retorna o resultado parcial
+
+    task 'baseline' retorna {'entries': [(caminho, entrada, assinatura)]};
+    task 'verify' compara os arquivos com expected ({caminho: hash}) e
+    retorna listas no formato de verify_files_against_baseline. Com send,
+    os resultados saem em lotes de batch_size e o retorno só traz contagens.
+    """
+    scanner = FileScanner.from_config(config)
+    algorithm = config['hash_algorithm']
+    engine = HashEngine.from_config(config)
+    keys = ('entries',) if task == 'baseline' else VERIFY_KEYS
+    partial = {key: [] for key in keys}
+    pending = 0
+    totals = dict.fromkeys(keys, 0)
+
+    def flush():
+        nonlocal partial, pending
+        for key in keys:
+            totals[key] += len(partial[key])
+        send(partial)
+        partial = {key: [] for key in keys}
+        pending = 0
+
+    if task == 'baseline':
+        sampling = SamplingPolicy.from_config(config)
+        for path, stat_info in iter_shard(shard, scanner):
+            result = build_baseline_entry(path, algorithm, stat_info, sampling, engine=engine)
+            if result:
+                partial['entries'].append(result)
+                pending += 1
+            if send and pending >= batch_size:
+                flush()
+    else:
+        expected = dict(expected or {})
+        for path, _ in iter_shard(shard, scanner):
+            expected_hash = expected.pop(path, None)
+            if expected_hash is None:
+                partial['new'].append(path)
+            else:
+                current_hash = hash_file(path, algorithm, engine)
+                if current_hash is None:
+                    partial['errors'].append(f"Erro ao calcular hash de {path}")
+                elif current_hash == expected_hash:
+                    partial['unchanged'].append(path)
+                else:
+                    partial['modified'].append({'file_path': path,
+                                                'expected_hash': expected_hash,
+                                                'current_hash': current_hash})
+            pending += 1
+            if send and pending >= batch_size:
+                flush()
+        partial['deleted'].extend(path for path in expected if not os.path.exists(path))
+
+    if send is None:
+        return partial
+    flush()
+    return totals
+
+
+def run_worker(address, authkey, name=None, heartbeat_interval=5.0):
+    """Loop de um worker: conecta ao coordenador e processa shards até 'stop'"""
+    from multiprocessing.connection import Client
+
+    name = name or f"{platform.node()}:{os.getpid()}"
+    try:
+        conn = Client(address, authkey=authkey)
+    except OSError as e:
+        # coordenador já encerrado (todos os shards concluídos) ou inacessível
+        logging.warning(f"Worker {name} não conectou a {address}: {e}")
+        return
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+    busy = threading.Event()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def heartbeat():
+        # só durante um shard: ocioso entre execuções, ninguém lê a conexão
+        while not stopped.wait(heartbeat_interval):
+            if not busy.is_set():
+                continue
+            try:
+                send({'type': 'heartbeat'})
+            except OSError:
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    config = None
+    try:
+        send({'type': 'hello', 'worker': name})
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message['type'] == 'stop':
+                break
+            if message['type'] == 'config':
+                config = message['config']
+                continue
+
+            shard = message['shard']
+            busy.set()
+            try:
+                totals = run_shard(
+                    shard, config, message['task'], message.get('expected'),
+                    send=lambda partial: send({'type': 'partial', 'shard': shard['id'],
+                                               'partial': partial}),
+                    batch_size=message.get('batch_size', 1000)
+                )
+                send({'type': 'done', 'shard': shard['id'], 'totals': totals})
+            except Exception as e:
+                logging.error(f"Erro no shard {shard['id']}: {e}")
+                send({'type': 'error', 'shard': shard['id'], 'error': str(e)})
+            finally:
+                busy.clear()
+    finally:
+        stopped.set()
+        conn.close()
+
+
+def _parse_address(address):
+    if isinstance(address, str) and ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    return address
+
+
+class ShardCoordinator:
+    """Distribui shards aos workers e junta os resultados parciais
+
+    O listener e os workers locais são criados na primeira execução e
+    reaproveitados pelas seguintes até close(). Cada worker conectado é
+    atendido por uma thread que retira shards da fila da execução atual. Os
+    lotes parciais de um shard só são aceitos quando o worker confirma o fim
+    do shard; se a conexão cai ou nenhum heartbeat chega em
+    'heartbeat_timeout' segundos, o shard volta para a fila (até
+    'max_attempts' tentativas). Workers locais que morrem são recriados.
+    """
+
+    def __init__(self, config, address=('127.0.0.1', 0), authkey=None, local_workers=0,
+                 strategy='subtree', shard_depth=1, hash_shards=None,
+                 heartbeat_timeout=30.0, max_attempts=3, batch_size=1000):
+        self.config = config
+        self.address = _parse_address(address)
+        self.authkey = authkey or os.urandom(32)
+        self.local_workers = local_workers
+        self.strategy = strategy
+        self.shard_depth = shard_depth
+        self.hash_shards = hash_shards or max(16, 4 * local_workers)
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self._listener = None
+        self._listen_address = None
+        self._acceptor = None
+        self._processes = []
+        self._respawns = 0
+        self._connected = 0
+        self._connected_lock = threading.Lock()
+        self._state = None
+        self._closed = threading.Event()
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o coordenador a partir de config['sharding'] (None se desabilitado)"""
+        options = config.get('sharding') or {}
+        if not options.get('enabled'):
+            return None
+        authkey = options.get('authkey') or os.environ.get('PYWATCHDOG_SHARD_KEY')
+        if not authkey and not options.get('workers', 1):
+            logging.warning("Sharding sem authkey: workers remotos não conseguirão conectar")
+        return cls(
+            config,
+            address=options.get('address', '127.0.0.1:0'),
+            authkey=authkey.encode() if authkey else None,
+            local_workers=options.get('workers', os.cpu_count() or 1),
+            strategy=options.get('strategy', 'subtree'),
+            shard_depth=options.get('shard_depth', 1),
+            hash_shards=options.get('hash_shards'),
+            heartbeat_timeout=options.get('heartbeat_timeout', 30.0),
+            max_attempts=options.get('max_attempts', 3),
+            batch_size=options.get('batch_size', 1000)
+        )
+
+    def plan(self):
+        scanner = FileScanner.from_config(self.config)
+        return plan_shards(self.config['monitored_dirs'], scanner, self.strategy,
+                           self.shard_depth, self.hash_shards)
+
+    def build_baseline(self, on_entry=None):
+        """Baseline distribuída: lista de (caminho, entrada, assinatura)
+
+        on_entry, se informado, recebe cada entrada assim que o shard termina.
+        """
+        entries = []
+
+        def merge(shard, result):
+            for item in result['entries']:
+                entries.append(item)
+                if on_entry:
+                    on_entry(*item)
+
+        self.run('baseline', self.plan(), merge)
+        return entries
+
+    def verify(self, baseline):
+        """Verifica a baseline ({caminho: entrada}) nos workers
+
+        Retorna o mesmo dicionário de verify_files_against_baseline, com
+        'new' listando arquivos fora da baseline, mais 'failed_shards'.
+        """
+        shards = self.plan()
+        parts, orphans = ShardMap(shards).partition(baseline)
+        if orphans:
+            # subárvores removidas desde a baseline não geram shard próprio
+            shards.append({'id': 'paths:orphans', 'kind': 'paths', 'paths': sorted(orphans)})
+            parts['paths:orphans'] = orphans
+        results = {key: [] for key in VERIFY_KEYS}
+
+        def merge(shard, result):
+            for key in VERIFY_KEYS:
+                results[key].extend(result[key])
+
+        results['failed_shards'] = self.run('verify', shards, merge, parts)
+        for shard_id in results['failed_shards']:
+            results['errors'].append(f"Shard não verificado: {shard_id}")
+        return results
+
+    def start(self):
+        """Abre o listener e cria os workers locais; retorna o endereço do listener"""
+        from multiprocessing.connection import Listener
+
+        if self._listener is not None:
+            return self._listen_address
+        self._closed.clear()
+        self._stopping.clear()
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self._listen_address = self._listener.address
+        self._acceptor = threading.Thread(target=self._accept, daemon=True)
+        self._acceptor.start()
+        self._processes = [self._spawn() for _ in range(self.local_workers)]
+        self._respawns = self.local_workers * self.max_attempts
+        logging.info(f"Coordenador em {self._listen_address}: "
+                     f"{self.local_workers} workers locais")
+        return self._listen_address
+
+    def close(self):
+        """Envia 'stop' aos workers, espera os locais saírem e fecha o listener"""
+        if self._listener is None:
+            return
+        self._closed.set()
+        # o listener continua aceitando até os workers locais saírem: um
+        # worker que ainda está subindo conecta, recebe 'stop' e termina
+        for process in self._processes:
+            process.join(10)
+            if process.is_alive():
+                process.terminate()
+        self._stopping.set()
+        self._wake()
+        self._listener.close()
+        self._acceptor.join(5)
+        self._listener = None
+        self._processes = []
+
+    def run(self, task, shards, merge, expected=None):
+        """Executa task em todos os shards; retorna {shard: erro} dos que falharam
+
+        merge(shard, resultado) é chamado com o lock do coordenador, então
+        não precisa ser thread-safe. Se nenhum worker estiver conectado nem
+        subindo por 'heartbeat_timeout' segundos (respawns esgotados, ou
+        workers: 0 sem remotos), os shards pendentes são dados como falhos.
+        """
+        state = _RunState(shards, self.max_attempts, task, merge, expected)
+        self.start()
+        logging.info(f"Coordenador: {len(shards)} shards ({task})")
+        self._state = state
+        idle_since = None
+        try:
+            while not state.done.wait(1.0):
+                self._replace_dead_workers()
+                if self._has_workers():
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= self.heartbeat_timeout:
+                    state.fail_pending(f"nenhum worker disponível há {self.heartbeat_timeout}s")
+        finally:
+            state.done.set()
+            self._state = None
+        logging.info(f"Shards concluídos: {len(shards) - len(state.failed)}/{len(shards)}")
+        return state.failed
+
+    def _accept(self):
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stopping.is_set():
+                    return
+                continue
+            except Exception as e:
+                logging.warning(f"Conexão de worker recusada: {e}")
+                continue
+            if self._stopping.is_set():
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        """Atende um worker: shards das execuções até close() ou a conexão cair"""
+        worker = None
+        connected = False
+        try:
+            worker = conn.recv().get('worker')
+            conn.send({'type': 'config', 'config': worker_config(self.config)})
+            with self._connected_lock:
+                self._connected += 1
+            connected = True
+            while not self._closed.is_set():
+                state = self._state
+                if state is None or state.done.is_set():
+                    self._closed.wait(0.2)
+                    continue
+                try:
+                    shard = state.pending.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                try:
+                    conn.send({'type': 'task', 'task': state.task, 'shard': shard,
+                               'expected': (state.expected or {}).get(shard['id']),
+                               'batch_size': self.batch_size})
+                    result = self._receive(conn, shard, state.task)
+                except Exception as e:
+                    state.retry(shard, f"worker {worker} perdido: {str(e) or type(e).__name__}")
+                    return
+                if isinstance(result, str):
+                    state.retry(shard, f"worker {worker}: {result}")
+                else:
+                    state.complete(shard, result)
+            conn.send({'type': 'stop'})
+        except (EOFError, OSError):
+            pass
+        finally:
+            if connected:
+                with self._connected_lock:
+                    self._connected -= 1
+            conn.close()
+
+    def _has_workers(self):
+        """Se há worker conectado ou processo local ainda vivo (subindo)"""
+        return self._connected > 0 or any(p.exitcode is None for p in self._processes)
+
+    def _replace_dead_workers(self):
+        for index, process in enumerate(self._processes):
+            if process.exitcode is not None and self._respawns > 0:
+                logging.warning(f"Worker local {process.pid} saiu com código "
+                                f"{process.exitcode}, criando outro")
+                self._processes[index] = self._spawn()
+                self._respawns -= 1
+
+    def _receive(self, conn, shard, task):
+        """Acumula os lotes de um shard até 'done'; retorna o resultado ou o erro"""
+        keys = ('entries',) if task == 'baseline' else VERIFY_KEYS
+        result = {key: [] for key in keys}
+        while True:
+            if not conn.poll(self.heartbeat_timeout):
+                raise TimeoutError(f"sem heartbeat há {self.heartbeat_timeout}s")
+            message = conn.recv()
+            kind = message['type']
+            if kind == 'partial':
+                for key in keys:
+                    result[key].extend(message['partial'][key])
+            elif kind == 'done':
+                return result
+            elif kind == 'error':
+                return message['error']
+
+    def _spawn(self):
+        import multiprocessing
+
+        # spawn: o coordenador já tem threads, e fork as copiaria em estado indefinido
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(target=run_worker,
+                                  args=(self._listen_address, self.authkey), daemon=False)
+        process.start()
+        return process
+
+    def _wake(self):
+        """Desbloqueia o accept() pendente para o listener poder fechar"""
+        from multiprocessing.connection import Client
+
+        try:
+            Client(self._listen_address, authkey=self.authkey).close()
+        except Exception:
+            pass
+
+
+class _RunState:
+    def __init__(self, shards, max_attempts, task, merge, expected=None):
+        self.task = task
+        self.merge = merge
+        self.expected = expected
+        self.pending = queue.Queue()
+        self.remaining = len(shards)
+        self.attempts = {}
+        self.failed = {}
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        for shard in shards:
+            self.pending.put(shard)
+        if not shards:
+            self.done.set()
+
+    def complete(self, shard, result):
+        with self.lock:
+            self.merge(shard, result)
+            self._finish()
+
+    def retry(self, shard, error):
+        with self.lock:
+            attempts = self.attempts[shard['id']] = self.attempts.get(shard['id'], 0) + 1
+            if attempts < self.max_attempts:
+                logging.warning(f"Shard {shard['id']} reatribuído ({error})")
+                self.pending.put(shard)
+                return
+            logging.error(f"Shard {shard['id']} falhou após {attempts} tentativas: {error}")
+            self.failed[shard['id']] = error
+            self._finish()
+
+    def fail_pending(self, error):
+        """Dá como falhos os shards ainda na fila (nenhum worker para processá-los)"""
+        with self.lock:
+            while True:
+                try:
+                    shard = self.pending.get_nowait()
+                except queue.Empty:
+                    return
+                logging.error(f"Shard {shard['id']} não processado: {error}")
+                self.failed[shard['id']] = error
+                self._finish()
+
+    def _finish(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.done.set()
+
+
+def main(argv=None):
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Varredura distribuída do PyWatchdog")
+    sub = parser.add_subparsers(dest='command', required=True)
+    worker = sub.add_parser('worker', help="conecta a um coordenador e processa shards")
+    worker.add_argument('--connect', required=True, help="host:porta ou socket Unix")
+    worker.add_argument('--authkey', default=os.environ.get('PYWATCHDOG_SHARD_KEY'))
+    for command in ('baseline', 'verify'):
+        coordinator = sub.add_parser(command, help=f"coordena {command} distribuído")
+        coordinator.add_argument('--config', default='config/config.yaml')
+        coordinator.add_argument('--workers', type=int, help="workers locais")
+        coordinator.add_argument('--listen', help="endereço para workers remotos")
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        if not args.authkey:
+            parser.error("informe --authkey ou PYWATCHDOG_SHARD_KEY")
+        run_worker(_parse_address(args.connect), args.authkey.encode())
+        return 0
+
+    try:
+        from .monitor import FileIntegrityMonitor
+    except ImportError:
+        from monitor import FileIntegrityMonitor
+
+    monitor = FileIntegrityMonitor(args.config)
+    options = monitor.config['sharding'] = dict(monitor.config.get('sharding') or {})
+    options['enabled'] = True
+    if args.workers is not None:
+        options['workers'] = args.workers
+    if args.listen:
+        options['address'] = args.listen
+
+    start = time.perf_counter()
+    if args.command == 'baseline':
+        monitor.create_baseline()
+        summary = {'files': len(monitor.baseline)}
+    else:
+        monitor.load_baseline()
+        results = monitor.verify_sharded()
+        summary = {key: len(value) for key, value in results.items()}
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    monitor.shutdown()
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
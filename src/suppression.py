@@ -0,0 +1,62 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class AlertIndex:
+    """Índice de alertas já emitidos para suprimir repetições
+
+    Guarda, por caminho, o último (tipo de alteração, hash atual) alertado.
+    O mesmo estado não é realertado até expirar o 'ttl' (segundos; 0 desativa
+    a expiração). O índice é limitado a 'max_entries' caminhos em ordem LRU.
+    """
+
+    def __init__(self, ttl=86400, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.suppressed = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria o índice a partir de config['alert_dedup'] (None se desativado)"""
+        options = config.get('alert_dedup') or {}
+        if not options.get('enabled', True):
+            return None
+        return cls(ttl=options.get('ttl', 86400), max_entries=options.get('max_entries', 100000))
+
+    def should_alert(self, path, change_type, current_hash=None, now=None):
+        """Registra o estado e indica se ele ainda não foi alertado"""
+        now = time.time() if now is None else now
+        state = (change_type, current_hash)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == state and (
+                    not self.ttl or now - entry[1] < self.ttl):
+                self._entries.move_to_end(path)
+                self.suppressed += 1
+                return False
+
+            self._entries[path] = (state, now)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def discard(self, path):
+        """Esquece o estado de um caminho (arquivo voltou ao normal ou foi reconhecido)"""
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def active(self):
+        """Lista os alertas ativos como (caminho, tipo, hash, timestamp)"""
+        with self._lock:
+            return [(path, state[0], state[1], ts)
+                    for path, (state, ts) in self._entries.items()]
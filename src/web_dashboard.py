@@ -1,9 +1,27 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Blueprint, render_template, jsonify, Response, request
 import yaml
 import os
+import json
+from datetime import datetime
+
+try:
+    from .baseline_store import BaselineStore
+    from .pubsub import event_bus, monitor_stats
+    from .service import MonitorService
+    from .export import export_source, export_stream
+    from .metrics import metrics
+except ImportError:
+    from baseline_store import BaselineStore
+    from pubsub import event_bus, monitor_stats
+    from service import MonitorService
+    from export import export_source, export_stream
+    from metrics import metrics
 
 app = Flask(__name__)
 
+# API JSON/streaming e /metrics, registradas também pelo run.py
+api = Blueprint('api', __name__)
+
 # básico 
 class Config:
     host = '0.0.0.0'
@@ -12,6 +30,8 @@ class Config:
 
 config = Config()
 
+monitor_service = None
+
 # Carregar configuração
 def load_config():
     config_path = os.path.join('config', 'config.yaml')
@@ -19,43 +39,198 @@ def load_config():
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
     return {}
-# exemplo
 def load_monitoring_data():
+    if monitor_service is not None:
+        return monitor_service.snapshot()
+    
+    # Contadores mantidos pelo monitor rodando neste processo
+    stats = monitor_stats.snapshot()
+    if stats['total_files']:
+        return stats
+    
+    total_files = 0
+    db_path = load_config().get('baseline_db')
+    if db_path and os.path.exists(db_path):
+        store = BaselineStore(db_path, readonly=True)
+        total_files = store.count()
+        store.close()
+    
     return {
-        'total_files': 0,
-        'unchanged_files': 0,
+        'total_files': total_files,
+        'unchanged_files': total_files,
         'modified_files': 0,
         'deleted_files': 0,
         'critical_alerts': 0,
         'total_alerts': 0
     }
 
-def start_monitoring():
-    pass
+def start_monitoring(config_path=os.path.join('config', 'config.yaml')):
+    global monitor_service
+    if monitor_service is None:
+        monitor_service = MonitorService(config_path).start()
+    return monitor_service
 
 
 @app.route('/')
 def index():
+    stats = load_monitoring_data()
+    last_scan = stats.get('last_scan')
+    if last_scan:
+        last_scan = datetime.fromtimestamp(last_scan).strftime('%d/%m/%Y %H:%M')
     return render_template('index.html', 
-                         files_count=0, 
-                         alerts_count=0, 
-                         last_scan=None)
+                         files_count=stats['total_files'], 
+                         alerts_count=stats['total_alerts'], 
+                         last_scan=last_scan)
 
 @app.route('/dashboard')
 def dashboard():
     stats = load_monitoring_data()
     recent_alerts = []
+    if monitor_service is not None and monitor_service.monitor is not None:
+        recent_alerts = list(monitor_service.monitor.alert_history)[-10:][::-1]
     return render_template('dashboard.html', 
                          stats=stats, 
                          recent_alerts=recent_alerts)
 
-@app.route('/api/verify', methods=['POST'])
+@api.route('/api/stats')
+def api_stats():
+    return jsonify(load_monitoring_data())
+
+@api.route('/api/events')
+def api_events():
+    """Stream de alterações em tempo real (Server-Sent Events)"""
+    subscription = event_bus.subscribe()
+    
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not subscription.closed:
+                event = subscription.get(timeout=15)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api.route('/api/verify', methods=['POST'])
 def api_verify():
-    return jsonify({'success': True, 'message': 'Verificação iniciada'})
+    if monitor_service is None:
+        return jsonify({'success': False, 'message': 'Monitoramento não iniciado'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    job_id = monitor_service.submit_scan(data.get('paths'), data.get('full', False))
+    return jsonify({'success': True, 'message': 'Verificação iniciada', 'job_id': job_id}), 202
+
+@api.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    job = monitor_service.get_job(job_id) if monitor_service else None
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job não encontrado'}), 404
+    return jsonify({'success': True, 'job': job})
 
-@app.route('/api/export')
+@api.route('/api/files')
+def api_files():
+    """Listagem paginada por cursor com filtros e ordenação"""
+    if monitor_service is None:
+        return jsonify({'success': False, 'message': 'Monitoramento não iniciado'}), 503
+    
+    try:
+        page = monitor_service.list_files(
+            limit=min(request.args.get('limit', 50, type=int), 1000),
+            cursor=request.args.get('cursor'),
+            status=request.args.get('status'),
+            directory=request.args.get('directory'),
+            extension=request.args.get('extension'),
+            sort=request.args.get('sort', 'path'),
+            order=request.args.get('order', 'asc')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **page})
+
+@api.route('/api/files/<path:file_path>')
+def api_file_detail(file_path):
+    if monitor_service is None:
+        return jsonify({'success': False, 'message': 'Monitoramento não iniciado'}), 503
+    
+    detail = monitor_service.file_detail(file_path) or monitor_service.file_detail('/' + file_path)
+    if detail is None:
+        return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
+    return jsonify({'success': True, 'file': detail})
+
+@api.route('/api/history/<path:file_path>')
+def api_file_history(file_path):
+    """Versões de um arquivo no histórico (?at=ISO8601 para a versão naquele instante)"""
+    monitor = monitor_service.monitor if monitor_service else None
+    if monitor is None or not monitor.history:
+        return jsonify({'success': False, 'message': 'Histórico de baseline desabilitado'}), 404
+    
+    at = request.args.get('at')
+    if at:
+        entry = (monitor_service.file_history(file_path, at=at) or
+                 monitor_service.file_history('/' + file_path, at=at))
+        return jsonify({'success': True, 'path': file_path, 'at': at, 'entry': entry})
+    
+    limit = request.args.get('limit', type=int)
+    versions = (monitor_service.file_history(file_path, limit=limit) or
+                monitor_service.file_history('/' + file_path, limit=limit))
+    return jsonify({'success': True, 'path': file_path, 'versions': versions})
+
+@api.route('/api/content/<digest>')
+def api_content_paths(digest):
+    """Arquivos da baseline com o mesmo conteúdo (requer hash_cache)"""
+    paths = monitor_service.content_paths(digest) if monitor_service else None
+    if paths is None:
+        return jsonify({'success': False, 'message': 'Cache de hashes desabilitado'}), 404
+    return jsonify({'success': True, 'digest': digest, 'paths': paths})
+
+@api.route('/api/export')
 def api_export():
-    return jsonify({'success': True, 'data': []})
+    """Exportação em streaming: ?kind=baseline|report|alerts&format=ndjson|csv&gzip=1"""
+    kind = request.args.get('kind', 'baseline')
+    fmt = request.args.get('format', 'ndjson')
+    compress = request.args.get('gzip', '0') in ('1', 'true')
+    
+    monitor = monitor_service.monitor if monitor_service else None
+    store = None
+    db_path = load_config().get('baseline_db')
+    if monitor is None and db_path and os.path.exists(db_path):
+        store = BaselineStore(db_path, readonly=True)
+    
+    try:
+        records, fields = export_source(kind, monitor, store)
+        body = export_stream(records, fmt, fields, compress)
+    except ValueError as e:
+        if store is not None:
+            store.close()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    filename = f"pywatchdog-{kind}.{fmt}" + ('.gz' if compress else '')
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    if compress:
+        mimetype = 'application/gzip'
+    response = Response(body, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    if store is not None:
+        # o corpo é lido depois do return: fecha só quando o streaming terminar
+        response.call_on_close(store.close)
+    return response
+
+@api.route('/metrics')
+def metrics_endpoint():
+    """Métricas no formato texto do Prometheus (config 'metrics_enabled')"""
+    if not metrics.enabled:
+        return Response("Métricas desabilitadas (metrics_enabled: false)\n", status=404,
+                        mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+app.register_blueprint(api)
 
 if __name__ == '__main__':
-    app.run(host=config.host, port=config.port, debug=config.debug)
+    if os.path.exists(os.path.join('config', 'config.yaml')):
+        start_monitoring()
+    app.run(host=config.host, port=config.port, debug=config.debug, use_reloader=False)
@@ -0,0 +1,64 @@
+import json
+import logging
+
+from src.monitor import FileIntegrityMonitor
+from src.scanner import FileScanner
+from src.sharding import ShardCoordinator, ShardMap, plan_shards
+
+
+def make_tree(root):
+    (root / 'sub').mkdir(parents=True)
+    for name in ('a.txt', 'b.txt', 'sub/c.txt'):
+        (root / name).write_text(name)
+
+
+def write_config(tmp_path, directory, **sharding):
+    config = tmp_path / 'config.yaml'
+    config.write_text(json.dumps({
+        'monitored_dirs': [directory],
+        'hash_algorithm': 'sha256',
+        'check_interval': 60,
+        'sharding': dict({'enabled': True, 'workers': 1}, **sharding)
+    }))
+    return str(config)
+
+
+def test_shard_map_with_trailing_slash(tmp_path):
+    root = tmp_path / 'tree'
+    make_tree(root)
+    shards = plan_shards([str(root) + '/'], FileScanner())
+    shard_map = ShardMap(shards)
+    ids = {shard['id'] for shard in shards}
+    assert shard_map.shard_for(str(root / 'a.txt')) in ids
+    assert shard_map.shard_for(str(root / 'sub' / 'c.txt')) in ids
+
+
+def test_verify_sharded_with_trailing_slash(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / 'tree'
+    make_tree(root)
+    monitor = FileIntegrityMonitor(write_config(tmp_path, str(root) + '/'))
+    try:
+        monitor.create_baseline()
+        (root / 'new.txt').write_text('new')
+        results = monitor.verify_sharded()
+    finally:
+        monitor.shutdown()
+    assert results['new'] == [str(root / 'new.txt')]
+    assert sorted(results['unchanged']) == sorted(
+        str(root / name) for name in ('a.txt', 'b.txt', 'sub/c.txt'))
+    assert not results['failed_shards']
+
+
+def test_run_without_workers_fails_pending_shards(tmp_path):
+    root = tmp_path / 'tree'
+    make_tree(root)
+    logging.disable(logging.ERROR)
+    coordinator = ShardCoordinator({'monitored_dirs': [str(root)], 'hash_algorithm': 'sha256'},
+                                   local_workers=0, heartbeat_timeout=1)
+    try:
+        failed = coordinator.run('baseline', coordinator.plan(), lambda shard, result: None)
+    finally:
+        coordinator.close()
+        logging.disable(logging.NOTSET)
+    assert set(failed) == {shard['id'] for shard in coordinator.plan()}